@@ -1,14 +1,103 @@
+import inspect
+from functools import partial
 import awkward as ak
 import numpy as np
+import numba
+
+# modes of `_overlap_kernel`
+CONE = 0
+BOOSTED_CONE = 1
+
+
+def _flat(array):
+    "Flattened (along the events) float64 numpy array with NaN for None"
+    return ak.to_numpy(
+        ak.fill_none(ak.flatten(array, axis=1), np.nan)
+    ).astype(np.float64)
+
+
+def _jagged_columns(obj, *columns):
+    """
+    Offsets and flattened numpy arrays of the given columns of a collection
+    (missing events are treated as empty)
+    """
+    counts = ak.to_numpy(ak.fill_none(ak.num(obj, axis=1), 0))
+    offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+    np.cumsum(counts, out=offsets[1:])
+    return offsets, [_flat(obj[column]) for column in columns]
+
+
+def _unflatten_like(flat, obj, offsets):
+    "Jagged array with the event structure of `obj` (including missing events)"
+    out = ak.unflatten(flat, np.diff(offsets))
+    missing = ak.to_numpy(ak.is_none(obj, axis=0))
+    if missing.any():
+        out = out.mask[~missing]
+    return out
+
+
+@numba.njit(cache=True)
+def _overlap_kernel(offsets1, eta1, phi1, pt1, offsets2, eta2, phi2, mode, cone_size):
+    """
+    Mask for the objects 1 that are within deltaR of any object 2 in the same
+    event - with `cone_size` for mode CONE, with a pt dependent cone up to
+    `cone_size` for mode BOOSTED_CONE
+    """
+    out = np.zeros(len(eta1), dtype=np.bool_)
+    for event in range(len(offsets1) - 1):
+        for i in range(offsets1[event], offsets1[event + 1]):
+            cone = cone_size
+            if mode == BOOSTED_CONE:
+                cone = min(10000.0 / pt1[i] + 0.04, cone_size)
+            for j in range(offsets2[event], offsets2[event + 1]):
+                deta = eta1[i] - eta2[j]
+                dphi = (phi1[i] - phi2[j] + np.pi) % (2 * np.pi) - np.pi
+                if np.sqrt(deta * deta + dphi * dphi) < cone:
+                    out[i] = True
+                    break
+    return out
+
+
+def _cone_mode(filter_dr):
+    """
+    Mode and cone size of `_overlap_kernel` for `match_dr` or
+    `match_boosted_dr` (optionally with `functools.partial`) - None for other
+    filter functions
+    """
+    kwargs = {}
+    if isinstance(filter_dr, partial):
+        if filter_dr.args:
+            return None
+        kwargs = filter_dr.keywords
+        filter_dr = filter_dr.func
+    if filter_dr is match_dr:
+        mode, name = CONE, "cone_size"
+    elif filter_dr is match_boosted_dr:
+        mode, name = BOOSTED_CONE, "max_cone_size"
+    else:
+        return None
+    return mode, kwargs.get(name, inspect.signature(filter_dr).parameters[name].default)
+
 
 def has_overlap(obj1, obj2, filter_dr):
     """
     Return mask array where obj1 has overlap with obj2 based on a filter
     function on deltaR (and pt of the first one)
+
+    `match_dr` and `match_boosted_dr` are evaluated by a numba kernel
+    without building the cartesian product
     """
-    obj1x, obj2x = ak.unzip(ak.cartesian([obj1, obj2], nested=True))
-    dr = obj1x.delta_r(obj2x)
-    return ak.any(filter_dr(dr, obj1.pt), axis=-1)
+    cone_mode = _cone_mode(filter_dr)
+    if cone_mode is None:
+        obj1x, obj2x = ak.unzip(ak.cartesian([obj1, obj2], nested=True))
+        dr = obj1x.delta_r(obj2x)
+        return ak.any(filter_dr(dr, obj1.pt), axis=-1)
+    offsets1, (eta1, phi1, pt1) = _jagged_columns(obj1, "eta", "phi", "pt")
+    offsets2, (eta2, phi2) = _jagged_columns(obj2, "eta", "phi")
+    mask = _overlap_kernel(
+        offsets1, eta1, phi1, pt1, offsets2, eta2, phi2, *cone_mode
+    )
+    return _unflatten_like(mask, obj1, offsets1)
 
 
 def match_dr(dr, pt, cone_size=0.2):
@@ -19,55 +108,108 @@ def match_boosted_dr(dr, pt, max_cone_size=0.4):
     return dr < np.minimum(*ak.broadcast_arrays(10000.0 / pt + 0.04, max_cone_size))
 
 
-def muon_track_links(muons):
-    return muons["inDetTrackParticleLink.m_persIndex"].mask[
-        muons["inDetTrackParticleLink.m_persKey"] != 0
-    ]
+def _track_links(obj):
+    """
+    Offsets of the objects per event, offsets of the track links per object
+    and the links as m_persKey << 32 | m_persIndex (0 for m_persKey == 0) -
+    ghost tracks for jets, the ID track for muons
+    """
+    if "GhostTrack" in obj.fields:
+        keys, indices = obj.GhostTrack.m_persKey, obj.GhostTrack.m_persIndex
+    else:
+        keys = obj["inDetTrackParticleLink.m_persKey"]
+        indices = obj["inDetTrackParticleLink.m_persIndex"]
+    event_offsets, _ = _jagged_columns(obj)
+    keys = ak.flatten(keys, axis=1)
+    indices = ak.flatten(indices, axis=1)
+    if keys.ndim > 1:
+        link_counts = ak.to_numpy(ak.num(keys, axis=1))
+        keys = ak.flatten(keys)
+        indices = ak.flatten(indices)
+    else:
+        link_counts = np.ones(len(keys), dtype=np.int64)
+    link_offsets = np.zeros(len(link_counts) + 1, dtype=np.int64)
+    np.cumsum(link_counts, out=link_offsets[1:])
+    keys = ak.to_numpy(keys).astype(np.uint64)
+    indices = ak.to_numpy(indices).astype(np.uint64)
+    links = np.where(keys != 0, (keys << np.uint64(32)) | indices, np.uint64(0))
+    return event_offsets, link_offsets, links
 
 
-def jet_ghost_links(jets):
-    return jets.GhostTrack.m_persIndex.mask[jets.GhostTrack.m_persKey != 0]
+@numba.njit(cache=True)
+def _association_kernel(
+    event_offsets1, link_offsets1, links1, event_offsets2, link_offsets2, links2
+):
+    """
+    Mask for the objects 1 that share any (valid) link with any object 2 in
+    the same event - binary search in the sorted links of objects 2
+    """
+    out = np.zeros(len(link_offsets1) - 1, dtype=np.bool_)
+    for event in range(len(event_offsets1) - 1):
+        start = link_offsets2[event_offsets2[event]]
+        stop = link_offsets2[event_offsets2[event + 1]]
+        if start == stop:
+            continue
+        candidates = np.sort(links2[start:stop])
+        for i in range(event_offsets1[event], event_offsets1[event + 1]):
+            for link in links1[link_offsets1[i]:link_offsets1[i + 1]]:
+                if link == 0:
+                    continue
+                k = np.searchsorted(candidates, link)
+                if k < len(candidates) and candidates[k] == link:
+                    out[i] = True
+                    break
+    return out
 
 
-def is_associated(idx1, idx2):
+def is_associated(obj1, obj2):
     """
-    Used for muon-jet ghost association
+    Used for muon-jet ghost association - mask for obj1 where any of the
+    track links (ghost tracks for jets, ID track for muons) matches one of
+    obj2 (both m_persKey and m_persIndex)
     """
-    # TODO: check if keys also match
-    xx1, xx2 = ak.unzip(ak.cartesian([idx1, idx2], nested=True))
-    return ak.fill_none(ak.any(ak.any(xx1 == xx2, axis=-1), axis=-1), False)
+    event_offsets1, link_offsets1, links1 = _track_links(obj1)
+    event_offsets2, link_offsets2, links2 = _track_links(obj2)
+    mask = _association_kernel(
+        event_offsets1, link_offsets1, links1, event_offsets2, link_offsets2, links2
+    )
+    return ak.fill_none(_unflatten_like(mask, obj1, event_offsets1), False)
 
 
 def has_overlap_mujet(obj1, obj2, filter_dr):
     """
     Check if either ghost associated or delta_r match
     """
-    if "GhostTrack" in obj1.fields:
-        ghost_match = is_associated(jet_ghost_links(obj1), muon_track_links(obj2))
-    else:
-        ghost_match = is_associated(muon_track_links(obj1), jet_ghost_links(obj2))
-    return has_overlap(obj1, obj2, filter_dr) | ghost_match
+    return has_overlap(obj1, obj2, filter_dr) | is_associated(obj1, obj2)
+
+
+GeV = 1000.0
 
+# thresholds of the MuPFlow jet overlap removal
+MU_PFLOW_OR_CONFIG = {
+    "lowNtrk_x1": 0.7,
+    "lowNtrk_x2": 0.85,
+    "lowNtrk_y0": 15.0 * GeV,
+    "lowNtrk_y1": 15.0 * GeV,
+    "lowNtrk_y2": 30.0 * GeV,
+    "highNtrk_x1": 0.6,
+    "highNtrk_x2": 0.9,
+    "highNtrk_y0": 5.0 * GeV,
+    "highNtrk_y1": 5.0 * GeV,
+    "highNtrk_y2": 30.0 * GeV,
+    "numJetTrk": 4,
+}
 
-def mu_pflow_or_requirement(jets, muons):
+
+def mu_pflow_or_requirement(jets, muons, config=None):
     """
     Taken from this beautiful piece:
     https://gitlab.cern.ch/atlas/athena/-/blob/c8de5319c743b68e3e4935a5e34c7ccb8da778bf/PhysicsAnalysis/AnalysisCommon/AssociationUtils/Root/MuPFJetOverlapTool.cxx#L167
     I have no idea what's going on here ...
-    """
 
-    GeV = 1000.0
-    lowNtrk_x1 = 0.7
-    lowNtrk_x2 = 0.85
-    lowNtrk_y0 = 15.0 * GeV
-    lowNtrk_y1 = 15.0 * GeV
-    lowNtrk_y2 = 30.0 * GeV
-    highNtrk_x1 = 0.6
-    highNtrk_x2 = 0.9
-    highNtrk_y0 = 5.0 * GeV
-    highNtrk_y1 = 5.0 * GeV
-    highNtrk_y2 = 30.0 * GeV
-    numJetTrk = 4
+    Thresholds from `MU_PFLOW_OR_CONFIG`, updated by `config`
+    """
+    c = {**MU_PFLOW_OR_CONFIG, **(config or {})}
 
     mu_id_pt = muons.id_pt
     mu_topoetcone40 = muons.topoetcone40
@@ -83,21 +225,76 @@ def mu_pflow_or_requirement(jets, muons):
         )
 
     return ak.where(
-        nTrk < numJetTrk,
-        requirements(lowNtrk_x1, lowNtrk_x2, lowNtrk_y0, lowNtrk_y1, lowNtrk_y2),
-        requirements(highNtrk_x1, highNtrk_x2, highNtrk_y0, highNtrk_y1, highNtrk_y2),
+        nTrk < c["numJetTrk"],
+        requirements(c["lowNtrk_x1"], c["lowNtrk_x2"], c["lowNtrk_y0"], c["lowNtrk_y1"], c["lowNtrk_y2"]),
+        requirements(c["highNtrk_x1"], c["highNtrk_x2"], c["highNtrk_y0"], c["highNtrk_y1"], c["highNtrk_y2"]),
     )
 
 
-def has_mu_pflow_overlap(jets, muons, cone_size=0.4):
-    muons["id_pt"] = muons.trackParticle.pt
-    jets["NumTrkPt500_0"] = ak.firsts(jets.NumTrkPt500, axis=-1)
-    jets["SumPtTrkPt500_0"] = ak.firsts(jets.SumPtTrkPt500, axis=-1)
-    jets_x, muons_x = ak.unzip(ak.cartesian([jets, muons], nested=True))
-    return ak.any(
-        mu_pflow_or_requirement(jets_x, muons_x) & (jets_x.delta_r(muons_x) < cone_size),
-        axis=-1
+@numba.njit(cache=True, error_model="numpy")
+def _mu_pflow_overlap_kernel(
+    jet_offsets, jet_eta, jet_phi, jet_ntrk, jet_sumtrkpt,
+    mu_offsets, mu_eta, mu_phi, mu_id_pt, mu_topoetcone40,
+    cone_size, low, high, num_jet_trk,
+):
+    """
+    `mu_pflow_or_requirement` & deltaR < `cone_size` for any muon, in one
+    pass over jets and muons. `low` and `high` are the thresholds (x1, x2,
+    y0, y1, y2) for jets with less/at least `num_jet_trk` tracks. Jets or
+    muons with missing values (NaN) don't overlap.
+    """
+    out = np.zeros(len(jet_eta), dtype=np.bool_)
+    for event in range(len(jet_offsets) - 1):
+        for i in range(jet_offsets[event], jet_offsets[event + 1]):
+            if np.isnan(jet_ntrk[i]) or np.isnan(jet_sumtrkpt[i]):
+                continue
+            x1, x2, y0, y1, y2 = low if jet_ntrk[i] < num_jet_trk else high
+            for j in range(mu_offsets[event], mu_offsets[event + 1]):
+                if np.isnan(mu_id_pt[j]) or np.isnan(mu_topoetcone40[j]):
+                    continue
+                deta = jet_eta[i] - mu_eta[j]
+                dphi = (jet_phi[i] - mu_phi[j] + np.pi) % (2 * np.pi) - np.pi
+                if not np.sqrt(deta * deta + dphi * dphi) < cone_size:
+                    continue
+                ratio = mu_id_pt[j] / jet_sumtrkpt[i]
+                if (
+                    (mu_topoetcone40[j] < y0)
+                    or (mu_topoetcone40[j] < y0 + (y2 - y1) / (x2 - x1) * (ratio - x1))
+                    or (ratio > x2)
+                ):
+                    out[i] = True
+                    break
+    return out
+
+
+def has_mu_pflow_overlap(jets, muons, cone_size=0.4, config=None):
+    """
+    Mask for jets that overlap with muons according to
+    `mu_pflow_or_requirement` within deltaR < `cone_size` (evaluated in a
+    numba kernel). Thresholds from `MU_PFLOW_OR_CONFIG`, updated by `config`
+    """
+    c = {**MU_PFLOW_OR_CONFIG, **(config or {})}
+    jet_offsets, (jet_eta, jet_phi) = _jagged_columns(jets, "eta", "phi")
+    mu_offsets, (mu_eta, mu_phi, mu_topoetcone40) = _jagged_columns(
+        muons, "eta", "phi", "topoetcone40"
+    )
+    mask = _mu_pflow_overlap_kernel(
+        jet_offsets,
+        jet_eta,
+        jet_phi,
+        _flat(ak.firsts(jets.NumTrkPt500, axis=-1)),
+        _flat(ak.firsts(jets.SumPtTrkPt500, axis=-1)),
+        mu_offsets,
+        mu_eta,
+        mu_phi,
+        _flat(muons.trackParticle.pt),
+        mu_topoetcone40,
+        float(cone_size),
+        tuple(float(c[f"lowNtrk_{k}"]) for k in ["x1", "x2", "y0", "y1", "y2"]),
+        tuple(float(c[f"highNtrk_{k}"]) for k in ["x1", "x2", "y0", "y1", "y2"]),
+        c["numJetTrk"],
     )
+    return _unflatten_like(mask, jets, jet_offsets)
 
 
 def get_obj_sel(evt):
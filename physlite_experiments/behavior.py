@@ -1,58 +1,282 @@
 import awkward as ak
 import numpy as np
+import numba
 from coffea.nanoevents.methods import vector
 
 ak.behavior.update(vector.behavior)
 
 
+@numba.njit(cache=True)
+def _global_link_index(link_event, link_key, link_index, keys, offsets, bases):
+    """
+    Index of each link into the concatenation of the (flattened) target
+    collections or -1 if the key is unknown or the index out of range.
+
+    `keys` are the sorted hash keys of the target collections, `offsets` the
+    offsets for each of them (one row per key) and `bases` the start of each
+    collection in the concatenation (all 0 for the `globalIndex` column
+    computed by `physlite_events.LazyGet`).
+    """
+    out = np.empty(len(link_event), dtype=np.int64)
+    for i in range(len(link_event)):
+        k = np.searchsorted(keys, link_key[i])
+        if k >= len(keys) or keys[k] != link_key[i]:
+            out[i] = -1
+            continue
+        start = offsets[k, link_event[i]]
+        stop = offsets[k, link_event[i] + 1]
+        if link_index[i] < 0 or start + link_index[i] >= stop:
+            out[i] = -1
+            continue
+        out[i] = bases[k] + start + link_index[i]
+    return out
+
+
+def _index_targets(global_index, bases, contents):
+    """
+    Layout of the linked objects - an IndexedArray for one target collection,
+    otherwise a UnionArray of all of them. Invalid links (-1) become None.
+    """
+    valid = global_index >= 0
+    if len(contents) == 0:
+        # no known target collection - all None
+        return ak.layout.IndexedOptionArray64(
+            ak.layout.Index64(np.full(len(global_index), -1, dtype=np.int64)),
+            ak.layout.EmptyArray(),
+        )
+    if len(contents) == 1:
+        if valid.all():
+            return ak.layout.IndexedArray64(ak.layout.Index64(global_index), contents[0])
+        return ak.layout.IndexedOptionArray64(ak.layout.Index64(global_index), contents[0])
+    valid_index = global_index[valid]
+    tags = np.searchsorted(bases, valid_index, side="right") - 1
+    union = ak.layout.UnionArray8_64(
+        ak.layout.Index8(tags.astype(np.int8)),
+        ak.layout.Index64(valid_index - bases[tags]),
+        contents,
+    )
+    if valid.all():
+        return union
+    option_index = np.full(len(global_index), -1, dtype=np.int64)
+    option_index[valid] = np.arange(len(valid_index))
+    return ak.layout.IndexedOptionArray64(ak.layout.Index64(option_index), union)
+
+
+def _strip_event_wrappers(layout):
+    """
+    Remove the event-level masks/indices (e.g. from `events.mask[...]`) around
+    `layout` - returns the inner layout and the removed layouts (outermost
+    first, see `_rewrap`)
+    """
+    wrappers = []
+    while True:
+        if isinstance(layout, ak.layout.VirtualArray):
+            layout = layout.array
+        elif isinstance(
+            layout,
+            (ak.layout.IndexedArray64, ak.layout.IndexedOptionArray64, ak.layout.ByteMaskedArray),
+        ):
+            wrappers.append(layout)
+            layout = layout.content
+        else:
+            return layout, wrappers
+
+
+def _rewrap(wrappers, layout):
+    "Put the masks/indices from `_strip_event_wrappers` around `layout` again"
+    for wrapper in reversed(wrappers):
+        if isinstance(wrapper, ak.layout.ByteMaskedArray):
+            layout = ak.layout.ByteMaskedArray(
+                wrapper.mask, layout, valid_when=wrapper.valid_when
+            )
+        else:
+            layout = type(wrapper)(wrapper.index, layout)
+    return layout
+
+
+def _link_buffers(layout):
+    """
+    The offsets and link columns of `layout` (None if it's not just nested
+    ListOffsetArrays of link records)
+    """
+    buffers = []
+    while True:
+        if isinstance(layout, ak.layout.VirtualArray):
+            layout = layout.array
+        elif isinstance(layout, ak.layout.ListOffsetArray64):
+            buffers.append(np.asarray(layout.offsets))
+            layout = layout.content
+        else:
+            break
+    if not isinstance(layout, ak.layout.RecordArray):
+        return None
+    for field in ["m_persKey", "m_persIndex", "globalIndex"]:
+        if field not in layout.keys():
+            continue
+        column = layout[field]
+        while isinstance(column, ak.layout.VirtualArray):
+            column = column.array
+        if not isinstance(column, ak.layout.NumpyArray):
+            return None
+        buffers.append(np.asarray(column))
+    return buffers
+
+
+def _buffers_key(buffers):
+    "Memory location and length of each array"
+    return tuple(
+        (array.__array_interface__["data"][0], len(array)) for array in buffers
+    )
+
+
 class xAODEvents:
     @property
     def _events(self):
         return self.behavior["__events__"][0]()
 
-    def element_link(self, links):
-        links = links[links.m_persKey != 0]
-        collection1 = self
-        keys = np.unique(ak.to_numpy(ak.flatten(links.m_persKey, axis=None)))
-        if len(keys) >= 2:
-            collections = [self._events[self._events.branch_names[key]] for key in keys]
-            return collections, keys, links.m_persIndex, links.m_persKey
-            # TODO: how to handle thinned tracks - maybe the ones with m_persKey == 0?
-            # need to filter, but then maybe the structure changes (becomes IndexedArray)
-            # but maybe that is not really a problem, because we use it flattened below?
-            # -> probably also need to use masked arrays
+    def _link_targets(self, keys):
+        """
+        Flattened target collections for the given hash keys together with
+        their offsets and start positions in the concatenation (cached on the
+        events, such that the collections are only flattened once)
+        """
+        events = self._events
+        try:
+            cache = events._link_targets_cache
+        except AttributeError:
+            cache = events._link_targets_cache = {}
+        if tuple(keys) not in cache:
+            missing = [
+                events.branch_names.get(key, key) for key in keys
+                if events.branch_names.get(key) not in events.fields
+            ]
+            if missing:
+                raise KeyError(f"Link target collections not in the events: {missing}")
+            offsets = []
+            contents = []
+            for key in keys:
+                collection = events[events.branch_names[key]]
+                collection_offsets, content = collection.layout.offsets_and_flatten()
+                collection_offsets = np.asarray(collection_offsets)
+                offsets.append(collection_offsets - collection_offsets[0])
+                contents.append(content)
+            bases = np.cumsum([0] + [len(content) for content in contents[:-1]])
+            cache[tuple(keys)] = (
+                np.asarray(keys, dtype=np.int64),
+                np.stack(offsets),
+                bases,
+                contents,
+            )
+        return cache[tuple(keys)]
+
+    def element_link(self, links, targets=None):
+        """
+        Resolve ElementLinks (m_persKey, m_persIndex) per object of this
+        collection - either a list of links per object (links with m_persKey
+        == 0 are removed) or the name of a single link per object (split into
+        the fields "{name}.m_persKey" and "{name}.m_persIndex"). If the links
+        point into several collections the linked objects are a union of
+        them. Links with unknown keys or into collections that are not in the
+        events become None. If there are no valid links at all the result is
+        all None - of the type of the `targets` collections if given.
 
-            # TODO: now need to construct a union as content
+        Uses the `globalIndex` field of the links if it is there (see
+        `physlite_events.get_lazy_form`), otherwise the index into the target
+        collections is calculated from the event numbers (only works for
+        collections that are not sliced along the events).
+
+        The result is cached on the events per link columns (and `targets`),
+        so e.g. the links of a masked collection are only resolved once.
+        """
+        events = self._events
+        if isinstance(links, str):
+            layout, wrappers = _strip_event_wrappers(self.layout)
+            collection = ak.Array(layout)
+            links = ak.zip(
+                {
+                    field: collection[f"{links}.{field}"]
+                    for field in ["m_persKey", "m_persIndex"]
+                }
+            )
+            layout = links.layout
         else:
-            self._events.branch_names  # TODO: seems i need to touch this first - what's going on?
-            collection2 = self._events[self._events.branch_names[keys[0]]]
-            (
-                offsets_collection2,
-                content_collection2,
-            ) = collection2.layout.offsets_and_flatten()
-        offsets_outer, _ = collection1.layout.offsets_and_flatten()
-        _, content_links = links.layout.offsets_and_flatten()
-        offsets_inner, _ = content_links.offsets_and_flatten()
-        # TODO: probably this doesn't work anymore if the array became indexed/masked?
-        # Need to do something like in NanoEvents where the index is made "global"
-        # -> need to create these virtual arrays as well (form key local2global)
-        return ak.Array(
-            ak.layout.ListOffsetArray64(
-                offsets_outer,
-                ak.layout.ListOffsetArray64(
-                    offsets_inner,
-                    ak.layout.IndexedArray64(
-                        ak.layout.Index64(
-                            ak.flatten(
-                                links.m_persIndex + np.array(offsets_collection2[:-1]),
-                                axis=None,
-                            )
-                        ),
-                        content_collection2,
+            layout, wrappers = _strip_event_wrappers(links.layout)
+        buffers = _link_buffers(layout)
+        if buffers is None:
+            linked = self._resolve_links(ak.Array(layout), targets)
+        else:
+            try:
+                cache = events._element_link_cache
+            except AttributeError:
+                cache = events._element_link_cache = {}
+            cache_key = (_buffers_key(buffers), tuple(targets or []))
+            if cache_key not in cache:
+                # keep the buffers such that their memory can't be reused
+                cache[cache_key] = (
+                    buffers,
+                    ak.Array(
+                        self._resolve_links(ak.Array(layout), targets),
+                        behavior=self.behavior,
                     ),
-                ),
-            )
+                )
+            if not wrappers:
+                return cache[cache_key][1]
+            linked = cache[cache_key][1].layout
+        return ak.Array(_rewrap(wrappers, linked), behavior=self.behavior)
+
+    def _resolve_links(self, links, targets):
+        "Layout of the linked objects for `links` without event-level masks"
+        if links.ndim == 3:
+            # TODO: how to handle thinned tracks - maybe the ones with m_persKey == 0?
+            links = links[links.m_persKey != 0]
+        events = self._events
+        branch_names = events.branch_names  # TODO: seems i need to touch this first - what's going on?
+        link_key = ak.to_numpy(ak.flatten(links.m_persKey, axis=None)).astype(np.int64)
+        keys = np.array(
+            [key for key in np.unique(link_key) if branch_names.get(key) in events.fields],
+            dtype=np.int64,
         )
+        counts = [
+            ak.to_numpy(ak.flatten(ak.num(links, axis=axis), axis=None))
+            for axis in range(1, links.ndim)
+        ]
+        if len(keys) == 0:
+            # no valid links in this chunk
+            contents = [
+                events[name].layout.offsets_and_flatten()[1]
+                for name in (targets or []) if name in events.fields
+            ]
+            bases = np.cumsum([0] + [len(content) for content in contents[:-1]])
+            global_index = np.full(len(link_key), -1, dtype=np.int64)
+        elif "globalIndex" in links.fields:
+            keys, offsets, bases, contents = self._link_targets(keys)
+            # index into the target collection, computed once per chunk
+            local_index = ak.to_numpy(ak.flatten(links.globalIndex, axis=None))
+            k = np.minimum(np.searchsorted(keys, link_key), len(keys) - 1)
+            global_index = np.where(
+                (local_index >= 0) & (keys[k] == link_key),
+                bases[k] + local_index,
+                -1,
+            )
+        else:
+            keys, offsets, bases, contents = self._link_targets(keys)
+            link_event = np.arange(len(links))
+            for count in counts:
+                link_event = np.repeat(link_event, count)
+            global_index = _global_link_index(
+                link_event,
+                link_key,
+                ak.to_numpy(ak.flatten(links.m_persIndex, axis=None)).astype(np.int64),
+                keys,
+                offsets,
+                bases,
+            )
+        out = _index_targets(global_index, bases, contents)
+        for count in reversed(counts):
+            out = ak.layout.ListOffsetArray64(
+                ak.layout.Index64(np.concatenate([[0], np.cumsum(count)])), out
+            )
+        return out
 
 
 @ak.mixin_class(ak.behavior)
@@ -66,7 +290,7 @@ class xAODParticle(vector.PtEtaPhiMLorentzVector, xAODEvents):
 class xAODElectron(xAODParticle):
     @property
     def trackParticles(self):
-        return self.element_link(self.trackParticleLinks)
+        return self.element_link(self.trackParticleLinks, targets=["GSFTrackParticles"])
 
     @property
     def trackParticle(self):
@@ -78,11 +302,9 @@ class xAODMuon(xAODParticle):
     @property
     def trackParticle(self):
         # TODO: need to deal with the other types of links
-        return self._events.CombinedMuonTrackParticles[
-            self["combinedTrackParticleLink.m_persIndex"].mask[
-                self["combinedTrackParticleLink.m_persKey"] != 0
-            ]
-        ]
+        return self.element_link(
+            "combinedTrackParticleLink", targets=["CombinedMuonTrackParticles"]
+        )
 
 
 @ak.mixin_class(ak.behavior)
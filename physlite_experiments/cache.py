@@ -0,0 +1,207 @@
+"""
+Caches for decoded columns
+"""
+
+import os
+import json
+import uuid
+import shutil
+import hashlib
+import threading
+from collections import OrderedDict
+from collections.abc import MutableMapping
+import numpy as np
+import awkward as ak
+from physlite_experiments.deserialization_hacks import branch_to_array
+
+
+class DiskCache:
+    """
+    Persistent on-disk cache for decoded branches. Arrays are stored as the
+    buffers from `ak.to_buffers` in .npy files (one directory per array,
+    together with the form and length) and loaded zero-copy via memory
+    mapping.
+
+    The key consists of the file UUID, the branch name, the interpretation and
+    the entry range.
+    """
+
+    def __init__(self, directory, verbose=False):
+        self.directory = directory
+        self.verbose = verbose
+        os.makedirs(directory, exist_ok=True)
+
+    @staticmethod
+    def key(branch, entry_start=None, entry_stop=None):
+        key = "{0}:{1}:{2}:{3}-{4}".format(
+            branch.file.uuid,
+            branch.name,
+            branch.interpretation.cache_key,
+            entry_start,
+            entry_stop,
+        )
+        return hashlib.sha1(key.encode()).hexdigest()
+
+    def _path(self, key):
+        return os.path.join(self.directory, key)
+
+    def __contains__(self, key):
+        return os.path.exists(os.path.join(self._path(key), "meta.json"))
+
+    def load(self, key):
+        "Load array from the cache (memory mapped) or return None if it doesn't exist"
+        path = self._path(key)
+        try:
+            with open(os.path.join(path, "meta.json")) as f:
+                meta = json.load(f)
+        except FileNotFoundError:
+            return None
+        container = {
+            name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode="r")
+            for name in meta["buffers"]
+        }
+        return ak.from_buffers(meta["form"], meta["length"], container)
+
+    def store(self, key, array):
+        path = self._path(key)
+        if os.path.exists(path):
+            return
+        form, length, container = ak.to_buffers(array)
+        # write to a temporary directory first and rename, such that
+        # concurrent jobs never see partially written entries
+        tmp_path = f"{path}.tmp-{uuid.uuid4().hex}"
+        os.makedirs(tmp_path)
+        try:
+            for name, buffer in container.items():
+                np.save(os.path.join(tmp_path, f"{name}.npy"), np.asarray(buffer))
+            with open(os.path.join(tmp_path, "meta.json"), "w") as f:
+                json.dump(
+                    {
+                        "form": json.loads(form.tojson()),
+                        "length": length,
+                        "buffers": list(container),
+                    },
+                    f
+                )
+            os.rename(tmp_path, path)
+        except OSError:
+            # e.g. another job was faster
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            if not os.path.exists(path):
+                raise
+
+    def branch_to_array(self, branch, entry_start=None, entry_stop=None, **kwargs):
+        "Like `deserialization_hacks.branch_to_array`, but using the disk cache"
+        key = self.key(branch, entry_start=entry_start, entry_stop=entry_stop)
+        array = self.load(key)
+        if array is not None:
+            return array
+        if self.verbose:
+            print("Disk cache miss for", branch.name)
+        array = branch_to_array(
+            branch, entry_start=entry_start, entry_stop=entry_stop, **kwargs
+        )
+        self.store(key, array)
+        return array
+
+    def clear(self):
+        shutil.rmtree(self.directory)
+        os.makedirs(self.directory)
+
+
+def _nbytes(value):
+    try:
+        return value.nbytes
+    except AttributeError:
+        return 0
+
+
+class LRUColumnCache(MutableMapping):
+    """
+    In-memory cache for decoded columns with a budget of `max_bytes` (as
+    reported by `nbytes` of the arrays). The least recently used entries are
+    evicted when the budget is exceeded.
+
+    Can be shared between chunks and files, e.g. passed as `cache` to
+    `physlite_events.LazyGet`, as `array_cache` to `branch_to_array` or as
+    `array_cache` to `uproot.open`.
+    """
+
+    def __init__(self, max_bytes=1024 ** 3):
+        self.max_bytes = max_bytes
+        self.current_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self._data = OrderedDict()
+        self._nbytes = {}
+        self._lock = threading.RLock()
+
+    def __getitem__(self, key):
+        with self._lock:
+            try:
+                value = self._data[key]
+            except KeyError:
+                self.misses += 1
+                raise
+            self._data.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def __contains__(self, key):
+        # hits and misses are only counted in `__getitem__` (and `get`)
+        with self._lock:
+            return key in self._data
+
+    def __setitem__(self, key, value):
+        nbytes = _nbytes(value)
+        with self._lock:
+            if key in self._data:
+                self._remove(key)
+            if nbytes > self.max_bytes:
+                # would evict everything else and still not fit
+                return
+            self._data[key] = value
+            self._nbytes[key] = nbytes
+            self.current_bytes += nbytes
+            while self.current_bytes > self.max_bytes:
+                self._remove(next(iter(self._data)))
+                self.evictions += 1
+
+    def _remove(self, key):
+        del self._data[key]
+        self.current_bytes -= self._nbytes.pop(key)
+
+    def __delitem__(self, key):
+        with self._lock:
+            self._remove(key)
+
+    def __iter__(self):
+        return iter(list(self._data))
+
+    def __len__(self):
+        return len(self._data)
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._nbytes.clear()
+            self.current_bytes = 0
+
+    @property
+    def stats(self):
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": self.evictions,
+            "entries": len(self),
+            "bytes": self.current_bytes,
+            "max_bytes": self.max_bytes,
+        }
+
+    def __repr__(self):
+        return (
+            f"<LRUColumnCache {len(self)} entries, "
+            f"{self.current_bytes}/{self.max_bytes} bytes, "
+            f"{self.hits} hits, {self.misses} misses, {self.evictions} evictions>"
+        )
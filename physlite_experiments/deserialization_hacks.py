@@ -1,15 +1,18 @@
 import uproot
-from uproot import AsObjects, AsVector, AsString
+from uproot import AsObjects, AsVector, AsSet, AsString
 import os
 import numba
 import numpy as np
 import awkward as ak
 import awkward.forth
 import queue
+from concurrent.futures import ThreadPoolExecutor
 
 __all__ = [
     "interpretation_is_vector_vector",
+    "array_cache_key",
     "branch_to_array",
+    "branches_to_arrays",
     "tree_arrays",
     "patch_nanoevents",
 ]
@@ -26,76 +29,264 @@ def _read_big_endian_int(data):
     return res
 
 
-@numba.njit(cache=True)
-def parse_vector_header(d, pos):
-    num_entries = _read_big_endian_int(d[pos + 6 : pos + 10])
-    return pos + 10, num_entries
+def _native_dtype(dtype):
+    """
+    Return the native byte order version of `dtype` and the number of bytes
+    that have to be reversed for each (primitive) value to convert from
+    `dtype`. A size of 1 means no byteswap is needed.
+    """
+    if dtype.fields is None:
+        field_dtypes = [dtype]
+    else:
+        field_dtypes = [dtype.fields[k][0] for k in dtype.fields]
+    swap_sizes = set(i.itemsize for i in field_dtypes)
+    if len(swap_sizes) != 1:
+        raise NotImplementedError(
+            f"Can't byteswap records with fields of different sizes ({dtype})"
+        )
+    swap_size = swap_sizes.pop()
+    if all(i.isnative for i in field_dtypes):
+        swap_size = 1
+    return dtype.newbyteorder("="), swap_size
 
 
-def _read_vector_vector(basket_data, num_entries, use_forth=False, **kwargs):
-    if not use_forth:
-        kwargs.pop("byte_offsets", None)
-        return _read_vector_vector_numba(basket_data.tobytes(), num_entries, **kwargs)
-    else:
-        return _read_nested_vector_forth(np.array(basket_data), num_entries, ndim=2, **kwargs)
+@numba.njit(nogil=True, cache=True)
+def _copy_swapped(d, pos, data, i_data, num_bytes, swap_size):
+    "Copy bytes, reversing the order within each unit of `swap_size` bytes"
+    for i in range(0, num_bytes, swap_size):
+        for j in range(swap_size):
+            data[i_data + i + j] = d[pos + i + swap_size - 1 - j]
 
 
-@numba.njit(cache=True)
-def _read_vector_vector_numba(
-    basket_data, num_entries, data_size=4, data_header_size=0, num_entries_size=4
+@numba.njit(nogil=True, cache=True)
+def _read_num_entries(d, pos, count_size):
+    """
+    Read the number of entries of a vector (`count_size` 4) or a string
+    (`count_size` 1 - followed by 4 more bytes for lengths >= 255)
+    """
+    num_entries = _read_big_endian_int(d[pos : pos + count_size])
+    pos += count_size
+    if count_size == 1 and num_entries == 255:
+        num_entries = _read_big_endian_int(d[pos : pos + 4])
+        pos += 4
+    return pos, num_entries
+
+
+@numba.njit(nogil=True, cache=True)
+def _count_nested_vector(
+    basket_data, pos, num_entries, header_sizes, count_sizes, data_size, data_header_size
 ):
     """
-    Deserialize raw data bytes that represent a list of
-    vector<vector<some_data_type>>. Only the outermost vector is assumed to
-    have a header.
+    First pass over `num_entries` entries of a basket of nested vectors,
+    starting at byte `pos`: only parse the headers (skipping over the data) to
+    determine the exact output sizes.
+
+    Returns the number of elements at each level below the outermost one
+    (the last one being the number of data elements).
+    """
+    d = basket_data
+    ndim = len(header_sizes)
+    counts = np.zeros(ndim, dtype=np.int64)
+    # number of vectors left to read at each level for the current parents
+    remaining = np.zeros(ndim, dtype=np.int64)
+    for i_entry in range(num_entries):
+        depth = 0
+        remaining[0] = 1
+        while depth >= 0:
+            if remaining[depth] == 0:
+                depth -= 1
+                continue
+            remaining[depth] -= 1
+            pos, num_entries_vector = _read_num_entries(
+                d, pos + header_sizes[depth], count_sizes[depth]
+            )
+            counts[depth] += num_entries_vector
+            if depth == ndim - 1:
+                pos += num_entries_vector * (data_header_size + data_size)
+            else:
+                remaining[depth + 1] = num_entries_vector
+                depth += 1
+    return counts
+
+
+@numba.njit(nogil=True, cache=True)
+def _fill_nested_vector(
+    basket_data,
+    pos,
+    num_entries,
+    header_sizes,
+    count_sizes,
+    data_size,
+    data_header_size,
+    swap_size,
+    offsets,
+    offsets_index,
+    offsets_value,
+    data,
+):
+    """
+    Second pass over `num_entries` entries of a basket of nested vectors,
+    starting at byte `pos`: write offsets and data into preallocated outputs
+    (sized from `_count_nested_vector`).
 
     Parameters:
     -----------
-    basket_data: array of bytes (eg. basket.raw_data)
-    border: last index containing any data (e.g. from basket.border, the rest will typically be the event byte offsets)
-    num_entries: number of events in this basket (e.g. from basket.num_entries)
+    basket_data: array of bytes (eg. basket.data)
+    pos: byte position of the first entry to read (e.g. from basket.byte_offsets)
+    num_entries: number of events to read
+    header_sizes: number of header bytes before the number of entries of the vectors at each level
+    count_sizes: number of bytes that encode the number of entries of the vectors at each level (1 for strings)
     data_size: number of bytes for each element
     data_header_size: number of header bytes to skip over (e.g 20 for ElementLink)
-    num_entries_size: number of bytes that encode the number of entries for the inner vectors.
-
+    swap_size: number of bytes to reverse for converting from big endian (1 for no byteswap)
+    offsets: output offsets for all levels (concatenated)
+    offsets_index: position in `offsets` where to write the next offset for each level (will be modified)
+    offsets_value: value of the offsets before this basket for each level (will be modified)
+    data: output data, as bytes (e.g. a uint8 view of a native typed array)
     """
     d = basket_data
-    # estimate - might need to grow the inner offsets (can have many empty entries)
-    buf_size = len(basket_data) // data_size
-    offsets_lvl1 = np.empty(num_entries + 1, dtype=np.int64)
-    offsets_lvl2 = np.empty(buf_size, dtype=np.int64)
-    offsets_lvl1[0] = 0
-    offsets_lvl2[0] = 0
-    actual_data = np.empty(len(basket_data), dtype=np.uint8)
-
-    pos = 0
-    i_offset_lvl1 = 1
-    i_offset_lvl2 = 1
+    ndim = len(header_sizes)
+    remaining = np.zeros(ndim, dtype=np.int64)
     i_data = 0
     for i_entry in range(num_entries):
-        pos, num_entries_lvl1 = parse_vector_header(d, pos)
-        offsets_lvl1[i_offset_lvl1] = offsets_lvl1[i_offset_lvl1 - 1] + num_entries_lvl1
-        i_offset_lvl1 += 1
-        for i_entry_lvl1 in range(num_entries_lvl1):
-            num_entries_lvl2 = _read_big_endian_int(d[pos : pos + num_entries_size])
-            if i_offset_lvl2 >= len(offsets_lvl2):
-                # grow if nescessary
-                offsets_lvl2 = np.concatenate(
-                    (offsets_lvl2, np.empty(buf_size, dtype=np.int64))
-                )
-            offsets_lvl2[i_offset_lvl2] = (
-                offsets_lvl2[i_offset_lvl2 - 1] + num_entries_lvl2
+        depth = 0
+        remaining[0] = 1
+        while depth >= 0:
+            if remaining[depth] == 0:
+                depth -= 1
+                continue
+            remaining[depth] -= 1
+            pos, num_entries_vector = _read_num_entries(
+                d, pos + header_sizes[depth], count_sizes[depth]
             )
-            i_offset_lvl2 += 1
-            pos += num_entries_size
-            for i_entry_lvl2 in range(num_entries_lvl2):
-                pos += data_header_size
-                for _ in range(data_size):
-                    actual_data[i_data] = d[pos]
-                    i_data += 1
-                    pos += 1
+            offsets_value[depth] += num_entries_vector
+            offsets[offsets_index[depth]] = offsets_value[depth]
+            offsets_index[depth] += 1
+            if depth < ndim - 1:
+                remaining[depth + 1] = num_entries_vector
+                depth += 1
+            elif data_header_size == 0:
+                num_bytes = num_entries_vector * data_size
+                _copy_swapped(d, pos, data, i_data, num_bytes, swap_size)
+                i_data += num_bytes
+                pos += num_bytes
+            else:
+                for i in range(num_entries_vector):
+                    pos += data_header_size
+                    _copy_swapped(d, pos, data, i_data, data_size, swap_size)
+                    i_data += data_size
+                    pos += data_size
 
-    return offsets_lvl1, offsets_lvl2[:i_offset_lvl2], actual_data[:i_data]
+
+def _basket_entry_ranges(baskets, entry_start=None, entry_stop=None):
+    """
+    Local entry ranges within each basket that overlap with the global entry
+    range `entry_start:entry_stop`
+    """
+    entry_ranges = []
+    for basket in baskets:
+        basket_start, basket_stop = basket.entry_start_stop
+        start = basket_start if entry_start is None else max(entry_start, basket_start)
+        stop = basket_stop if entry_stop is None else min(entry_stop, basket_stop)
+        entry_ranges.append((start - basket_start, max(stop, start) - basket_start))
+    return entry_ranges
+
+
+def _read_baskets_nested_vector(
+    baskets,
+    header_sizes,
+    count_sizes,
+    dtype,
+    data_header_size=0,
+    entry_ranges=None,
+    parallel=False,
+    num_workers=None,
+):
+    """
+    Deserialize a list of baskets of nested vectors with one level of offsets
+    per entry in `header_sizes`/`count_sizes`. A first pass determines the
+    exact output sizes of each basket, then all baskets are decoded directly
+    from the basket buffers into the preallocated outputs for the whole branch
+    (converted to native byte order on the fly).
+
+    Optionally, only the local entry ranges `entry_ranges` (one `(start,
+    stop)` per basket) are read - the decoding starts directly at the first
+    requested entry of each basket using `basket.byte_offsets`.
+
+    With `parallel=True` both passes run in a thread pool (the numba kernels
+    release the GIL).
+
+    Returns a list of offsets arrays (one per level) and the data array
+    """
+    ndim = len(header_sizes)
+    header_sizes = np.asarray(header_sizes, dtype=np.int64)
+    count_sizes = np.asarray(count_sizes, dtype=np.int64)
+    dtype, swap_size = _native_dtype(dtype)
+    data_size = dtype.itemsize
+    if entry_ranges is None:
+        entry_ranges = [(0, basket.num_entries) for basket in baskets]
+    positions = [
+        0 if start == 0 else int(basket.byte_offsets[start])
+        for basket, (start, stop) in zip(baskets, entry_ranges)
+    ]
+    num_entries = [stop - start for start, stop in entry_ranges]
+    executor = ThreadPoolExecutor(num_workers) if parallel else None
+    map_ = executor.map if parallel else map
+    try:
+        counts = list(
+            map_(
+                lambda i: _count_nested_vector(
+                    baskets[i].data,
+                    positions[i],
+                    num_entries[i],
+                    header_sizes,
+                    count_sizes,
+                    data_size,
+                    data_header_size,
+                ),
+                range(len(baskets)),
+            )
+        )
+        # starts[j, i] is the start index of basket j in the outputs for
+        # level i - which is also the value of the offsets of level i - 1 at
+        # that point. The last column is for the data
+        sizes = np.zeros((len(baskets) + 1, ndim + 1), dtype=np.int64)
+        sizes[1:, 0] = num_entries
+        for i, basket_counts in enumerate(counts):
+            sizes[i + 1, 1:] = basket_counts
+        starts = np.cumsum(sizes, axis=0)
+        # the offsets of all levels go into one buffer
+        level_starts = np.cumsum([0] + [n + 1 for n in starts[-1, :-1]])
+        offsets = np.empty(level_starts[-1], dtype=np.int64)
+        offsets[level_starts[:-1]] = 0
+        data = np.empty(starts[-1, -1], dtype=dtype)
+        data_bytes = data.view(np.uint8)
+
+        def fill_basket(i):
+            _fill_nested_vector(
+                baskets[i].data,
+                positions[i],
+                num_entries[i],
+                header_sizes,
+                count_sizes,
+                data_size,
+                data_header_size,
+                swap_size,
+                offsets,
+                level_starts[:-1] + 1 + starts[i, :-1],
+                starts[i, 1:].copy(),
+                data_bytes[starts[i, -1] * data_size : starts[i + 1, -1] * data_size],
+            )
+
+        # consume the iterator to propagate exceptions
+        list(map_(fill_basket, range(len(baskets))))
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    offsets = [
+        offsets[level_starts[i] : level_starts[i + 1]] for i in range(ndim)
+    ]
+    return offsets, data
 
 
 _forth_machine_cache = {}
@@ -174,104 +365,17 @@ def _read_nested_vector_forth(
     ]
 
 
-def _read_vector_vector_vector(basket_data, num_entries, use_forth=False, **kwargs):
-    if not use_forth:
-        kwargs.pop("byte_offsets", None)
-        return _read_vector_vector_vector_numba(basket_data.tobytes(), num_entries, **kwargs)
-    else:
-        return _read_nested_vector_forth(np.array(basket_data), num_entries, ndim=3, **kwargs)
-    pass
-
-
-@numba.njit(cache=True)
-def _read_vector_vector_vector_numba(
-    basket_data, num_entries, data_size=4, data_header_size=0, num_entries_size=4
-):
+def _basket_ranges(branch, entry_start=None, entry_stop=None):
     """
-    Deserialize raw data bytes that represent a list of
-    vector<vector<vector<some_data_type>>>. Only the outermost vector is assumed to
-    have a header.
-
-    Parameters:
-    -----------
-    basket_data: array of bytes (eg. basket.raw_data)
-    border: last index containing any data (e.g. from basket.border, the rest will typically be the event byte offsets)
-    num_entries: number of events in this basket (e.g. from basket.num_entries)
-    data_size: number of bytes for each element
-    data_header_size: number of header bytes to skip over (e.g 20 for ElementLink)
-    num_entries_size: number of bytes that encode the number of entries for the inner vectors.
+    Byte ranges of the baskets of a branch that overlap with the entry range.
 
+    Returns a dictionary basket number -> (start, stop)
     """
-    d = basket_data
-    # estimate - might need to grow the inner offsets (can have many empty entries)
-    buf_size = len(basket_data) // data_size
-    offsets_lvl1 = np.empty(num_entries + 1, dtype=np.int64)
-    offsets_lvl2 = np.empty(buf_size, dtype=np.int64)
-    offsets_lvl3 = np.empty(buf_size, dtype=np.int64)
-    offsets_lvl1[0] = 0
-    offsets_lvl2[0] = 0
-    offsets_lvl3[0] = 0
-    actual_data = np.empty(len(basket_data), dtype=np.uint8)
-
-    pos = 0
-    i_offset_lvl1 = 1
-    i_offset_lvl2 = 1
-    i_offset_lvl3 = 1
-    i_data = 0
-    for i_entry in range(num_entries):
-        pos, num_entries_lvl1 = parse_vector_header(d, pos)
-        offsets_lvl1[i_offset_lvl1] = offsets_lvl1[i_offset_lvl1 - 1] + num_entries_lvl1
-        i_offset_lvl1 += 1
-        for i_entry_lvl1 in range(num_entries_lvl1):
-            num_entries_lvl2 = _read_big_endian_int(d[pos : pos + num_entries_size])
-            if i_offset_lvl2 >= len(offsets_lvl2):
-                # grow if nescessary
-                offsets_lvl2 = np.concatenate(
-                    (offsets_lvl2, np.empty(buf_size, dtype=np.int64))
-                )
-            offsets_lvl2[i_offset_lvl2] = (
-                offsets_lvl2[i_offset_lvl2 - 1] + num_entries_lvl2
-            )
-            i_offset_lvl2 += 1
-            pos += num_entries_size
-            for i_entry_lvl2 in range(num_entries_lvl2):
-                num_entries_lvl3 = _read_big_endian_int(d[pos : pos + num_entries_size])
-                if i_offset_lvl3 >= len(offsets_lvl3):
-                    # grow if nescessary
-                    offsets_lvl3 = np.concatenate(
-                        (offsets_lvl3, np.empty(buf_size, dtype=np.int64))
-                    )
-                offsets_lvl3[i_offset_lvl3] = (
-                    offsets_lvl3[i_offset_lvl3 - 1] + num_entries_lvl3
-                )
-                i_offset_lvl3 += 1
-                pos += num_entries_size
-                for i_entry_lvl3 in range(num_entries_lvl3):
-                    pos += data_header_size
-                    for _ in range(data_size):
-                        actual_data[i_data] = d[pos]
-                        i_data += 1
-                        pos += 1
-
-    return (
-        offsets_lvl1,
-        offsets_lvl2[:i_offset_lvl2],
-        offsets_lvl3[:i_offset_lvl3],
-        actual_data[:i_data],
-    )
-
-
-def _get_baskets(branch, entry_start=None, entry_stop=None):
-    notifications = queue.Queue()
-    source = branch._file._source
-
-    basket_chunks = []
-    basket_ids = {}
+    ranges = {}
     entry_starts, entry_stops = (
         branch.member("fBasketEntry")[:-1],
         branch.member("fBasketEntry")[1:],
     )
-    basket_entries = branch.member("fBasketEntry")
     for i in range(branch.num_baskets):
 
         if entry_start is not None and entry_stops[i] <= entry_start:
@@ -281,30 +385,114 @@ def _get_baskets(branch, entry_start=None, entry_stop=None):
 
         start = branch.member("fBasketSeek")[i]
         stop = start + branch.basket_compressed_bytes(i)
-        basket_chunks.append((int(start), int(stop)))
-        basket_ids[start, stop] = i
-
-    def chunk_to_basket(chunk, basket_num):
-        cursor = uproot.source.cursor.Cursor(chunk.start)
-        return uproot.models.TBasket.Model_TBasket.read(
-            chunk,
-            cursor,
-            {"basket_num": basket_num},
-            branch._file,
-            branch._file,
-            branch,
-        )
+        ranges[i] = (int(start), int(stop))
+    return ranges
+
+
+def _chunk_to_basket(chunk, branch, basket_num):
+    cursor = uproot.source.cursor.Cursor(chunk.start)
+    return uproot.models.TBasket.Model_TBasket.read(
+        chunk,
+        cursor,
+        {"basket_num": basket_num},
+        branch._file,
+        branch._file,
+        branch,
+    )
+
+
+# seconds to wait for each requested chunk
+NOTIFICATION_TIMEOUT = 60
+
+# default limits for coalescing basket requests
+COALESCE_MAX_GAP = 64 * 1024
+COALESCE_MAX_SIZE = 32 * 1024 ** 2
 
-    source.chunks(basket_chunks, notifications)
-    result_baskets = {}
-    for i in range(len(basket_chunks)):
-        chunk = notifications.get(timeout=10)
-        basket_num = basket_ids[chunk.start, chunk.stop]
-        result_baskets[basket_num] = chunk_to_basket(chunk, basket_num)
+
+def _coalesce_ranges(ranges, max_gap=COALESCE_MAX_GAP, max_size=COALESCE_MAX_SIZE):
+    """
+    Merge byte ranges that are at most `max_gap` bytes apart, as long as the
+    merged range doesn't exceed `max_size` bytes. With `max_gap=None` nothing
+    is merged.
+
+    Returns a dictionary merged range -> list of original ranges
+    """
+    merged = []
+    for start, stop in sorted(set(ranges)):
+        if (
+            max_gap is not None
+            and len(merged) > 0
+            and start - merged[-1][1] <= max_gap
+            and max(stop, merged[-1][1]) - merged[-1][0] <= max_size
+        ):
+            merged[-1][1] = max(stop, merged[-1][1])
+            merged[-1][2].append((start, stop))
+        else:
+            merged.append([start, stop, [(start, stop)]])
+    return {(start, stop): parts for start, stop, parts in merged}
+
+
+def _get_baskets_multi(
+    branches,
+    entry_start=None,
+    entry_stop=None,
+    max_gap=COALESCE_MAX_GAP,
+    max_size=COALESCE_MAX_SIZE,
+):
+    """
+    Fetch the baskets that overlap with the entry range for several branches
+    of the same file with one call to `source.chunks`. Baskets that are close
+    to each other in the file are requested together (see `_coalesce_ranges`)
+    and split up again afterwards.
+
+    Returns a list (one per branch) of dictionaries basket number -> TBasket
+    """
+    notifications = queue.Queue()
+    basket_chunks = []
+    basket_ids = {}
+    for i_branch, branch in enumerate(branches):
+        ranges = _basket_ranges(branch, entry_start=entry_start, entry_stop=entry_stop)
+        for basket_num, (start, stop) in ranges.items():
+            basket_chunks.append((start, stop))
+            basket_ids[start, stop] = i_branch, basket_num
+
+    result_baskets = [{} for branch in branches]
+    if len(basket_chunks) == 0:
+        return result_baskets
+    source = branches[0]._file._source
+    requests = _coalesce_ranges(basket_chunks, max_gap=max_gap, max_size=max_size)
+    source.chunks(list(requests), notifications)
+    for i in range(len(requests)):
+        try:
+            chunk = notifications.get(timeout=NOTIFICATION_TIMEOUT)
+        except queue.Empty:
+            raise OSError(
+                f"Timed out waiting for {len(requests) - i} of {len(requests)} "
+                f"requests to {source.file_path}"
+            )
+        # raises if the request failed
+        chunk.wait()
+        for start, stop in requests[chunk.start, chunk.stop]:
+            if (start, stop) == (chunk.start, chunk.stop):
+                basket_chunk = chunk
+            else:
+                basket_chunk = uproot.source.chunk.Chunk.wrap(
+                    source,
+                    chunk.get(start, stop, uproot.source.cursor.Cursor(start), {}),
+                    start,
+                )
+            i_branch, basket_num = basket_ids[start, stop]
+            result_baskets[i_branch][basket_num] = _chunk_to_basket(
+                basket_chunk, branches[i_branch], basket_num
+            )
 
     return result_baskets
 
 
+def _get_baskets(branch, entry_start=None, entry_stop=None):
+    return _get_baskets_multi([branch], entry_start=entry_start, entry_stop=entry_stop)[0]
+
+
 def _get_start_stop(first_basket_start, num_entries, entry_start, entry_stop):
     stop = entry_stop or num_entries
     start = entry_start or 0
@@ -314,266 +502,337 @@ def _get_start_stop(first_basket_start, num_entries, entry_start, entry_stop):
     return this_entry_start, this_entry_stop
 
 
-def _branch_to_array_vector_vector(
-    branch,
-    dtype=np.dtype(">i4"),
-    data_size=4,
+def _read_baskets_nested_vector_forth(
+    baskets,
+    header_sizes,
+    count_sizes,
+    dtype,
     data_header_size=0,
-    num_entries_size=4,
-    entry_start=None,
-    entry_stop=None,
-    use_forth=False,
 ):
-    offsets_lvl1, offsets_lvl2, data = [], [], []
-    baskets = _get_baskets(branch, entry_start=entry_start, entry_stop=entry_stop)
-    for i in sorted(baskets):
-        basket = baskets[i]
-        offsets_lvl1_i, offsets_lvl2_i, data_i = _read_vector_vector(
-            basket.data,
+    """
+    Deserialize a list of baskets of nested vectors basket by basket with
+    AwkwardForth and concatenate.
+
+    Returns a list of offsets arrays (one per level) and the data array (in
+    native byte order)
+    """
+    ndim = len(header_sizes)
+    if (
+        list(header_sizes) != [6] + [0] * (ndim - 1)
+        or len(set(count_sizes[1:])) != 1
+    ):
+        raise NotImplementedError(
+            "AwkwardForth deserialization only implemented for inner vectors "
+            "without headers and with the same type of length fields"
+        )
+    offsets, data = [[] for i in range(ndim)], []
+    for basket in baskets:
+        *offsets_i, data_i = _read_nested_vector_forth(
+            np.array(basket.data),
             basket.num_entries,
             byte_offsets=basket.byte_offsets,
-            data_size=data_size,
+            data_size=dtype.itemsize,
             data_header_size=data_header_size,
-            num_entries_size=num_entries_size,
-            use_forth=use_forth
+            num_entries_size=count_sizes[1],
+            ndim=ndim,
         )
         data.append(data_i)
-        if len(offsets_lvl1) == 0:
-            offsets_lvl1.append(offsets_lvl1_i)
-            offsets_lvl2.append(offsets_lvl2_i)
-        else:
-            # add last offset from previous basket
-            if len(offsets_lvl1_i) > 1:
-                offsets_lvl1.append(offsets_lvl1_i[1:] + offsets_lvl1[-1][-1])
-            if len(offsets_lvl2_i) > 1:
-                offsets_lvl2.append(offsets_lvl2_i[1:] + offsets_lvl2[-1][-1])
-    offsets_lvl1, offsets_lvl2, data = [
-        np.concatenate(i) for i in [offsets_lvl1, offsets_lvl2, data]
-    ]
-    data = np.frombuffer(data.tobytes(), dtype=dtype)
+        for level_offsets, level_offsets_i in zip(offsets, offsets_i):
+            if len(level_offsets) == 0:
+                level_offsets.append(level_offsets_i)
+            elif len(level_offsets_i) > 1:
+                # add last offset from previous basket
+                level_offsets.append(level_offsets_i[1:] + level_offsets[-1][-1])
+    offsets = [np.concatenate(level_offsets) for level_offsets in offsets]
+    data = np.frombuffer(np.concatenate(data).tobytes(), dtype=dtype)
+    return offsets, data.astype(dtype.newbyteorder("="))
+
+
+def _data_to_layout(data):
     # storing in parquet needs contiguous arrays
     if data.dtype.fields is None:
-        data = ak.Array(data.newbyteorder().byteswap()).layout
+        return ak.layout.NumpyArray(data)
     else:
-        data = ak.zip(
-            {
-                k: np.ascontiguousarray(data[k]).newbyteorder().byteswap()
-                for k in data.dtype.fields
-            }
+        return ak.zip(
+            {k: np.ascontiguousarray(data[k]) for k in data.dtype.fields}
         ).layout
-    if entry_start is not None or entry_stop is not None:
-        start, stop = _get_start_stop(
-            baskets[min(baskets)].entry_start_stop[0],
-            branch.num_entries,
-            entry_start,
-            entry_stop,
-        )
-        offsets_lvl1 = offsets_lvl1[start: stop + 1]
-        offsets_lvl2 = offsets_lvl2[offsets_lvl1[0]: offsets_lvl1[-1] + 1]
-        data = data[offsets_lvl2[0]: offsets_lvl2[-1]]
-        offsets_lvl1 -= offsets_lvl1[0]
-        offsets_lvl2 -= offsets_lvl2[0]
-    array = ak.Array(
-        ak.layout.ListOffsetArray64(
-            ak.layout.Index64(offsets_lvl1),
-            ak.layout.ListOffsetArray64(
-                ak.layout.Index64(offsets_lvl2),
-                data,
-            ),
-        )
-    )
-    return array
 
 
-def _branch_to_array_vector_vector_vector(
-    branch, dtype=np.dtype(">i4"), data_size=4, data_header_size=0, num_entries_size=4, use_forth=False
-):
-    offsets_lvl1, offsets_lvl2, offsets_lvl3, data = [], [], [], []
-    baskets = _get_baskets(branch)
-    for i in range(branch.num_baskets):
-        basket = baskets[i]
-        (
-            offsets_lvl1_i,
-            offsets_lvl2_i,
-            offsets_lvl3_i,
-            data_i,
-        ) = _read_vector_vector_vector(
-            basket.data,
-            basket.num_entries,
-            data_size=data_size,
-            data_header_size=data_header_size,
-            num_entries_size=num_entries_size,
-            byte_offsets=basket.byte_offsets,
-            use_forth=use_forth,
-        )
-        data.append(data_i)
-        if len(offsets_lvl1) == 0:
-            offsets_lvl1.append(offsets_lvl1_i)
-            offsets_lvl2.append(offsets_lvl2_i)
-            offsets_lvl3.append(offsets_lvl3_i)
-        else:
-            # add last offset from previous basket
-            if len(offsets_lvl1_i) > 1:
-                offsets_lvl1.append(offsets_lvl1_i[1:] + offsets_lvl1[-1][-1])
-            if len(offsets_lvl2_i) > 1:
-                offsets_lvl2.append(offsets_lvl2_i[1:] + offsets_lvl2[-1][-1])
-            if len(offsets_lvl3_i) > 1:
-                offsets_lvl3.append(offsets_lvl3_i[1:] + offsets_lvl3[-1][-1])
-    offsets_lvl1, offsets_lvl2, offsets_lvl3, data = [
-        np.concatenate(i) for i in [offsets_lvl1, offsets_lvl2, offsets_lvl3, data]
-    ]
-    data = np.frombuffer(data.tobytes(), dtype=dtype)
-    # storing in parquet needs contiguous arrays
-    if data.dtype.fields is None:
-        data = ak.Array(data.newbyteorder().byteswap()).layout
-    else:
-        data = ak.zip(
-            {
-                k: np.ascontiguousarray(data[k]).newbyteorder().byteswap()
-                for k in data.dtype.fields
-            }
-        ).layout
-    return ak.Array(
-        ak.layout.ListOffsetArray64(
-            ak.layout.Index64(offsets_lvl1),
-            ak.layout.ListOffsetArray64(
-                ak.layout.Index64(offsets_lvl2),
-                ak.layout.ListOffsetArray64(
-                    ak.layout.Index64(offsets_lvl3),
-                    data,
-                ),
-            ),
-        ),
-    )
+def _slice_nested(offsets, data, start, stop):
+    "Select entries `start:stop` from nested offsets and data"
+    offsets = list(offsets)
+    offsets[0] = offsets[0][start : stop + 1]
+    for i in range(1, len(offsets)):
+        offsets[i] = offsets[i][offsets[i - 1][0] : offsets[i - 1][-1] + 1]
+    data = data[offsets[-1][0] : offsets[-1][-1]]
+    return [level_offsets - level_offsets[0] for level_offsets in offsets], data
 
 
-def _branch_to_array_vector_vector_elementlink(branch, **kwargs):
-    return _branch_to_array_vector_vector(
-        branch,
-        dtype=np.dtype([("m_persKey", ">i4"), ("m_persIndex", ">i4")]),
-        data_size=8,
-        data_header_size=20,
-        **kwargs,
+def _branch_to_array_nested_vector(
+    branch,
+    header_sizes,
+    count_sizes,
+    dtype,
+    data_header_size=0,
+    strings=False,
+    entry_start=None,
+    entry_stop=None,
+    use_forth=False,
+    parallel=False,
+    num_workers=None,
+    baskets=None,
+):
+    """
+    Deserialize a branch of nested vectors (see `_nested_vector_decoding` for
+    the parameters) into an awkward array. Optionally takes already fetched
+    `baskets` (dictionary basket number -> TBasket).
+    """
+    if baskets is None:
+        baskets = _get_baskets(branch, entry_start=entry_start, entry_stop=entry_stop)
+    baskets = [baskets[i] for i in sorted(baskets)]
+    kwargs = dict(
+        header_sizes=header_sizes,
+        count_sizes=count_sizes,
+        dtype=dtype,
+        data_header_size=data_header_size,
     )
+    if use_forth:
+        if parallel:
+            raise NotImplementedError(
+                "Parallel deserialization is only implemented for the numba kernels"
+            )
+        offsets, data = _read_baskets_nested_vector_forth(baskets, **kwargs)
+        if entry_start is not None or entry_stop is not None:
+            start, stop = _get_start_stop(
+                baskets[0].entry_start_stop[0],
+                branch.num_entries,
+                entry_start,
+                entry_stop,
+            )
+            offsets, data = _slice_nested(offsets, data, start, stop)
+    else:
+        offsets, data = _read_baskets_nested_vector(
+            baskets,
+            entry_ranges=_basket_entry_ranges(baskets, entry_start, entry_stop),
+            parallel=parallel,
+            num_workers=num_workers,
+            **kwargs,
+        )
+    layout = _data_to_layout(data)
+    if strings:
+        layout.setparameter("__array__", "char")
+    for i, level_offsets in enumerate(reversed(offsets)):
+        layout = ak.layout.ListOffsetArray64(ak.layout.Index64(level_offsets), layout)
+        if strings and i == 0:
+            layout.setparameter("__array__", "string")
+    return ak.Array(layout)
 
 
-def _branch_to_array_vector_string(branch, **kwargs):
-    array = _branch_to_array_vector_vector(
-        branch, dtype=np.uint8, data_size=1, num_entries_size=1, **kwargs
-    )
-    array.layout.content.setparameter("__array__", "string")
-    array.layout.content.content.setparameter("__array__", "char")
-    return array
+def _nested_vector_decoding(interpretation):
+    """
+    Check if the interpretation is a (at least 2-level) nested vector (or set)
+    of numbers, strings or ElementLinks that can be deserialized with
+    `_branch_to_array_nested_vector`.
+
+    Returns a dictionary of parameters for `_branch_to_array_nested_vector`
+    or None.
+    """
+    if not isinstance(interpretation, AsObjects):
+        return None
+    model = getattr(interpretation, "_model", None)
+    header_sizes, count_sizes = [], []
+    while isinstance(model, (AsVector, AsSet)):
+        header_sizes.append(6 if model.header else 0)
+        count_sizes.append(4)
+        model = model.values if isinstance(model, AsVector) else model.keys
+    decoding = dict(data_header_size=0, strings=False)
+    if isinstance(model, np.dtype):
+        decoding["dtype"] = model
+    elif isinstance(model, AsString):
+        # strings are vectors of chars
+        header_sizes.append(6 if model.header else 0)
+        count_sizes.append(1 if model.length_bytes == "1-5" else 4)
+        decoding["dtype"] = np.dtype(np.uint8)
+        decoding["strings"] = True
+    elif "ElementLink_3c_DataVector" in getattr(model, "__name__", ""):
+        decoding["dtype"] = np.dtype([("m_persKey", ">i4"), ("m_persIndex", ">i4")])
+        decoding["data_header_size"] = 20
+    else:
+        return None
+    if len(header_sizes) < 2:
+        return None
+    decoding["header_sizes"] = header_sizes
+    decoding["count_sizes"] = count_sizes
+    return decoding
 
 
 def interpretation_is_vector_vector(interpretation):
-    "... there is probably a better way"
-    if not isinstance(interpretation, AsObjects):
-        return False
-    if not hasattr(interpretation, "_model"):
-        return False
-    if not isinstance(interpretation._model, AsVector):
-        return False
-    if not interpretation._model.header:
-        return False
-    if not isinstance(interpretation._model.values, AsVector):
-        return False
-    if interpretation._model.values.header:
-        return False
-    if isinstance(interpretation._model.values.values, AsVector):
-        # vector<vector<vector
-        return False
-    return True
-
-
-_other_custom = {
-    "AsObjects(AsVector(True, AsVector(False, AsVector(False, dtype('>u8')))))": (
-        lambda branch, **kwargs: _branch_to_array_vector_vector_vector(
-            branch, dtype=np.dtype(">u8"), data_size=8, **kwargs
-        )
-    ),
-    "AsObjects(AsVector(True, AsVector(False, AsVector(False, dtype('uint8')))))": (
-        lambda branch, **kwargs: _branch_to_array_vector_vector_vector(
-            branch, dtype=np.dtype(">i1"), data_size=1, **kwargs
-        )
-    ),
-    "AsObjects(AsVector(True, AsSet(False, dtype('>u4'))))": (
-        lambda branch, **kwargs: _branch_to_array_vector_vector(
-            branch, dtype=np.dtype(">u4"), data_size=4, **kwargs
-        )
-    ),
-}
+    "Check if the branch can be deserialized with the custom functions"
+    return _nested_vector_decoding(interpretation) is not None
 
 
-def branch_to_array(branch, force_custom=False, **kwargs):
-    "Try to deserialize with the custom functions and fall back to uproot"
-    array = None
-    cache_key = "{0}:{1}:{2}:{3}-{4}:{5}".format(
+def array_cache_key(branch, entry_start=None, entry_stop=None):
+    "Key for caching the array of a branch in a given entry range"
+    return "{0}:{1}:{2}:{3}-{4}:{5}".format(
         branch.cache_key,
         branch.name,
         branch.interpretation.cache_key,
-        kwargs.get("entry_start", None),
-        kwargs.get("entry_stop", None),
+        entry_start,
+        entry_stop,
         "ak"
     )
-    if cache_key in branch.file.array_cache:
-        return branch.file.array_cache[cache_key]
-    if branch.interpretation == AsObjects(AsVector(True, AsString(False))):
-        array = _branch_to_array_vector_string(branch, **kwargs)
-    elif interpretation_is_vector_vector(branch.interpretation):
-        values = branch.interpretation._model.values.values
-        if isinstance(values, np.dtype):
-            array = _branch_to_array_vector_vector(
-                branch,
-                dtype=values,
-                data_size=values.itemsize,
-                data_header_size=0,
-                **kwargs,
-            )
-        else:
-            try:
-                if "ElementLink_3c_DataVector" in values.__name__:
-                    array = _branch_to_array_vector_vector_elementlink(branch, **kwargs)
-            except:
-                pass
-    elif str(branch.interpretation) in _other_custom:
-        array = _other_custom[str(branch.interpretation)](branch, **kwargs)
+
+
+def branch_to_array(
+    branch, force_custom=False, array_cache=None, baskets=None, **kwargs
+):
+    """
+    Try to deserialize with the custom functions and fall back to uproot
+
+    Arrays from custom deserialization are cached in `array_cache` (by default
+    `branch.file.array_cache`). Already fetched `baskets` (e.g. from
+    `_get_baskets_multi`) can be passed for custom deserialization.
+    """
+    array = None
+    cache_key = array_cache_key(
+        branch, kwargs.get("entry_start", None), kwargs.get("entry_stop", None)
+    )
+    if array_cache is None:
+        array_cache = branch.file.array_cache
+    if array_cache is not None:
+        array = array_cache.get(cache_key)
+        if array is not None:
+            return array
+    decoding = _nested_vector_decoding(branch.interpretation)
+    if decoding is not None:
+        array = _branch_to_array_nested_vector(
+            branch, baskets=baskets, **decoding, **kwargs
+        )
     if force_custom and array is None:
         raise TypeError(
             f"No custom deserialization for interpretation {branch.interpretation}"
         )
     if array is not None:
-        branch.file.array_cache[cache_key] = array
+        if array_cache is not None:
+            array_cache[cache_key] = array
         return array
-    kwargs.pop("use_forth", None)
+    for key in ["use_forth", "parallel", "num_workers"]:
+        kwargs.pop(key, None)
     return branch.array(**kwargs)
 
 
-def tree_arrays(tree, filter_name=None, filter_branch=None, use_forth=False):
+def branches_to_arrays(
+    branches,
+    entry_start=None,
+    entry_stop=None,
+    max_gap=COALESCE_MAX_GAP,
+    max_size=COALESCE_MAX_SIZE,
+    max_workers=None,
+    **kwargs,
+):
+    """
+    Read several branches of the same file (see `branch_to_array`). The baskets
+    of all branches with custom deserialization that are not cached yet are
+    fetched with one request, merging nearby byte ranges (see
+    `_coalesce_ranges`). With `max_workers` the branches are decoded in a
+    thread pool of that size.
+
+    Returns a list of arrays
+    """
+    array_cache = kwargs.get("array_cache", None)
+
+    def needs_fetch(branch):
+        if _nested_vector_decoding(branch.interpretation) is None:
+            return False
+        cache = branch.file.array_cache if array_cache is None else array_cache
+        if cache is None:
+            return True
+        return array_cache_key(branch, entry_start, entry_stop) not in cache
+
+    fetch = [i for i, branch in enumerate(branches) if needs_fetch(branch)]
+    baskets = dict(
+        zip(
+            fetch,
+            _get_baskets_multi(
+                [branches[i] for i in fetch],
+                entry_start=entry_start,
+                entry_stop=entry_stop,
+                max_gap=max_gap,
+                max_size=max_size,
+            ),
+        )
+    )
+
+    def decode(i):
+        return branch_to_array(
+            branches[i],
+            entry_start=entry_start,
+            entry_stop=entry_stop,
+            baskets=baskets.pop(i, None),
+            **kwargs,
+        )
+
+    if max_workers is None:
+        return [decode(i) for i in range(len(branches))]
+    with ThreadPoolExecutor(max_workers) as executor:
+        return list(executor.map(decode, range(len(branches))))
+
+
+def tree_arrays(
+    tree,
+    filter_name=None,
+    filter_branch=None,
+    use_forth=False,
+    entry_start=None,
+    entry_stop=None,
+    max_workers=None,
+):
     """
     Read all branches from a tree into arrays (using custom deserialization if
     possible). Optionally takes a filter function that takes a branch name and returns
-    True or False.
+    True or False and an entry range.
+
+    With `max_workers` the baskets of all branches are fetched at once and
+    the branches are decoded in a thread pool (see `branches_to_arrays`).
 
     Returns a dictionary of (awkward) arrays.
     """
 
-    array_dict = {}
+    branches = []
 
-    def fill_dict(branch):
+    def fill_list(branch):
         for sub in branch.branches:
-            fill_dict(sub)
+            fill_list(sub)
         if len(branch.branches) > 0:
             return
         if filter_name is not None and not filter_name(branch.name):
             return
         if filter_branch is not None and not filter_branch(branch):
             return
-        array_dict[branch.name] = branch_to_array(branch, use_forth=use_forth)
+        branches.append(branch)
 
-    fill_dict(tree)
+    fill_list(tree)
+
+    if max_workers is None:
+        arrays = [
+            branch_to_array(
+                branch,
+                use_forth=use_forth,
+                entry_start=entry_start,
+                entry_stop=entry_stop,
+            )
+            for branch in branches
+        ]
+    else:
+        arrays = branches_to_arrays(
+            branches,
+            entry_start=entry_start,
+            entry_stop=entry_stop,
+            max_workers=max_workers,
+            use_forth=use_forth,
+        )
 
-    return array_dict
+    return {branch.name: array for branch, array in zip(branches, arrays)}
 
 
 def _extract_base_form_no_fix(cls, tree, iteritems_options={}):
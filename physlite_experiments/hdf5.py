@@ -0,0 +1,246 @@
+"""
+Columnar HDF5 storage for awkward arrays (e.g. PHYSLITE events) using the
+buffers from `ak.to_buffers` - one dataset per buffer and the form as an
+attribute of the group.
+"""
+
+import json
+import numpy as np
+import awkward as ak
+import h5py
+
+
+class HDF5Writer:
+    """
+    Write awkward arrays of the same type into an HDF5 group, appending each
+    call of `write` (e.g. one chunk of events) to the datasets. Offsets of
+    appended chunks are shifted accordingly.
+
+    The datasets are chunked with `chunk_size` elements and compressed with
+    `compression`. With `chunk_size=None` the datasets are contiguous, which
+    only allows a single call of `write`, but without compression they can be
+    memory mapped by `HDF5Container`.
+    """
+
+    def __init__(
+        self,
+        filename,
+        group="awkward",
+        compression="lzf",
+        compression_opts=None,
+        chunk_size=2 ** 16,
+    ):
+        self.file = h5py.File(filename, "w")
+        self.group = self.file.create_group(group)
+        self.compression = compression
+        self.compression_opts = compression_opts
+        self.chunk_size = chunk_size
+        self.form = None
+
+    def _create_datasets(self, form, container):
+        for key, buffer in container.items():
+            buffer = np.asarray(buffer)
+            if self.chunk_size is None:
+                self.group.create_dataset(
+                    key,
+                    data=buffer,
+                    compression=self.compression,
+                    compression_opts=self.compression_opts,
+                )
+            else:
+                self.group.create_dataset(
+                    key,
+                    data=buffer,
+                    maxshape=(None,),
+                    chunks=(self.chunk_size,),
+                    compression=self.compression,
+                    compression_opts=self.compression_opts,
+                )
+        self.group.attrs["form"] = form
+        self.form = form
+
+    def write(self, array):
+        form, length, container = ak.to_buffers(array)
+        form = form.tojson()
+        if self.form is None:
+            self._create_datasets(form, container)
+            self.group.attrs["length"] = length
+            return
+        if self.chunk_size is None:
+            raise ValueError("Can't append to contiguous datasets (chunk_size=None)")
+        if form != self.form:
+            raise ValueError("Form of the array differs from the one already written")
+        for key, buffer in container.items():
+            buffer = np.asarray(buffer)
+            dataset = self.group[key]
+            n = dataset.shape[0]
+            if key.endswith("-offsets"):
+                # first offset is the last one of the previous chunk
+                buffer = buffer[1:] - buffer[0] + dataset[n - 1]
+            dataset.resize((n + len(buffer),))
+            dataset[n:] = buffer
+        self.group.attrs["length"] += length
+
+    def close(self):
+        self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+
+def to_hdf5(array, filename, **kwargs):
+    "Write an awkward array to HDF5 (see `HDF5Writer` for the options)"
+    with HDF5Writer(filename, **kwargs) as writer:
+        writer.write(array)
+
+
+def _enclosing_lists(form, enclosing=None, out=None):
+    """
+    Map each form key to the form key of the nearest enclosing
+    ListOffsetArray (None on the top level) - or False if the entries of the
+    node can't be determined from that (not supported for entry ranges)
+    """
+    if out is None:
+        out = {}
+    out[form.get("form_key")] = enclosing
+    if form["class"].startswith("ListOffsetArray"):
+        _enclosing_lists(form["content"], form["form_key"], out)
+    elif form["class"] == "RecordArray":
+        contents = form["contents"]
+        if isinstance(contents, dict):
+            contents = contents.values()
+        for content in contents:
+            _enclosing_lists(content, enclosing, out)
+    elif form["class"] != "NumpyArray":
+        # e.g. IndexedArray, UnionArray
+        for content in form.get("contents", []):
+            _enclosing_lists(content, False, out)
+        if "content" in form:
+            _enclosing_lists(form["content"], False, out)
+        out[form.get("form_key")] = False
+    return out
+
+
+class HDF5Container:
+    """
+    Container for `ak.from_buffers` that reads the datasets written by
+    `HDF5Writer` on demand. For an entry range only the needed slices of the
+    datasets are read (starting from the offsets of the enclosing lists).
+
+    With `mmap=True` contiguous, uncompressed datasets are memory mapped (the
+    memory maps stay valid after closing the file).
+
+    Use `open` to let the container own the file - it is closed with `close`
+    or when used as a context manager.
+    """
+
+    def __init__(self, group, entry_start=None, entry_stop=None, mmap=True, verbose=False):
+        self.file = None
+        self.group = group
+        self.form = json.loads(group.attrs["form"])
+        self.entry_start = 0 if entry_start is None else entry_start
+        self.entry_stop = (
+            int(group.attrs["length"]) if entry_stop is None else entry_stop
+        )
+        self.mmap = mmap
+        self.verbose = verbose
+        self._enclosing = _enclosing_lists(self.form)
+        self._raw_offsets = {}
+
+    @classmethod
+    def open(cls, filename, group="awkward", **kwargs):
+        "Open `filename` and read the awkward array from `group`"
+        f = h5py.File(filename, "r")
+        try:
+            container = cls(f[group], **kwargs)
+        except Exception:
+            f.close()
+            raise
+        container.file = f
+        return container
+
+    def close(self):
+        if self.file is not None:
+            self.file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exception_type, exception_value, traceback):
+        self.close()
+
+    @property
+    def length(self):
+        return self.entry_stop - self.entry_start
+
+    def _range(self, form_key):
+        enclosing = self._enclosing[form_key]
+        if enclosing is None:
+            return self.entry_start, self.entry_stop
+        if enclosing is False:
+            if (self.entry_start, self.entry_stop) != (0, int(self.group.attrs["length"])):
+                raise NotImplementedError(
+                    f"Can't read entry ranges for {form_key} (only nested lists and records)"
+                )
+            return None, None
+        offsets = self._offsets(enclosing)
+        return offsets[0], offsets[-1]
+
+    def _offsets(self, form_key):
+        if form_key not in self._raw_offsets:
+            start, stop = self._range(form_key)
+            self._raw_offsets[form_key] = self._read(
+                f"part0-{form_key}-offsets", start, None if stop is None else stop + 1
+            )
+        return self._raw_offsets[form_key]
+
+    def _read(self, key, start, stop):
+        if self.verbose:
+            print("Reading", key, start, stop)
+        dataset = self.group[key]
+        if self.mmap and dataset.chunks is None and dataset.compression is None:
+            offset = dataset.id.get_offset()
+            if offset is not None:
+                array = np.memmap(
+                    dataset.file.filename,
+                    dtype=dataset.dtype,
+                    mode="r",
+                    offset=offset,
+                    shape=dataset.shape,
+                )
+                return array[start:stop]
+        return dataset[start:stop]
+
+    def __getitem__(self, key):
+        part, form_key, attribute = key.split("-")
+        if attribute == "offsets":
+            offsets = self._offsets(form_key)
+            return offsets - offsets[0]
+        start, stop = self._range(form_key)
+        return self._read(key, start, stop)
+
+
+def from_hdf5(filename, group="awkward", entry_start=None, entry_stop=None, lazy=False, **kwargs):
+    """
+    Read an awkward array written by `HDF5Writer`. The file is closed after
+    reading, except with `lazy=True` - then it stays open as long as the
+    array (holding the `HDF5Container`) is alive.
+    """
+    container = HDF5Container.open(
+        filename,
+        group=group,
+        entry_start=entry_start,
+        entry_stop=entry_stop,
+        **kwargs
+    )
+    if lazy:
+        return ak.from_buffers(
+            json.dumps(container.form), container.length, container, lazy=True
+        )
+    with container:
+        return ak.from_buffers(
+            json.dumps(container.form), container.length, container
+        )
@@ -4,15 +4,75 @@ import threading
 import queue
 import uproot
 
+# response status codes for which requests are retried
+RETRY_STATUS = (408, 429, 500, 502, 503, 504)
+
+
+class FailedFuture:
+    "Future-like object for a failed request - raises when the result is requested"
+
+    def __init__(self, exception):
+        self._exception = exception
+
+    def result(self, timeout=None):
+        raise self._exception
+
+    def exception(self, timeout=None):
+        return self._exception
+
+
+def _content_range_start(headers):
+    "Start of the range from a `Content-Range: bytes a-b/n` header"
+    unit, _, spec = headers["Content-Range"].partition(" ")
+    if unit != "bytes":
+        raise ValueError(f"Unexpected Content-Range: {headers['Content-Range']}")
+    return int(spec.split("-")[0])
+
+
 class AIOHTTPSource(uproot.source.chunk.Source):
     """
     Experimental data source for uproot with asyncio and connection pooling using the aiohttp module.
     The event loop runs in a separate thread.
+
+    Failed requests (connection errors, timeouts and the status codes in
+    `RETRY_STATUS`) are retried up to `retries` times with exponential backoff
+    starting at `backoff` seconds. Each attempt has a `timeout` (in seconds)
+    and all ranges of one call to `chunks` have a common `deadline`. At most
+    `max_in_flight` requests are sent at the same time (independent of
+    `tcp_connection_limit`). Ranges that still fail are passed as chunks that
+    raise the error when their data is accessed, so consumers waiting for
+    notifications don't hang.
+
+    With `multirange=True`, `chunks` packs up to `max_ranges` ranges into one
+    request and parses the `multipart/byteranges` response part by part. If
+    the server doesn't support this (or the request fails) the ranges are
+    requested one by one and multi-range requests are disabled for this
+    source.
     """
-    def __init__(self, file_path, ssl_context=None, tcp_connection_limit=10, **options):
+    def __init__(
+        self,
+        file_path,
+        ssl_context=None,
+        tcp_connection_limit=10,
+        max_in_flight=100,
+        retries=3,
+        backoff=0.5,
+        timeout=60,
+        deadline=None,
+        multirange=False,
+        max_ranges=100,
+        **options
+    ):
         self._file_path = file_path
         self._ssl_context = ssl_context
         self._tcp_connection_limit = tcp_connection_limit
+        self._max_in_flight = max_in_flight
+        self._retries = retries
+        self._backoff = backoff
+        self._timeout = timeout
+        self._deadline = deadline
+        self._multirange = multirange
+        self._max_ranges = max_ranges
 
         def run_loop(loop, q):
             asyncio.set_event_loop(loop)
@@ -31,6 +91,8 @@ class AIOHTTPSource(uproot.source.chunk.Source):
         self._aio_exit_event = q.get()
 
         async def create_session():
+            # create the semaphore from within the event loop
+            self._semaphore = asyncio.Semaphore(self._max_in_flight)
             conn = aiohttp.TCPConnector(limit=self._tcp_connection_limit)
             return aiohttp.ClientSession(connector=conn)
 
@@ -55,18 +117,122 @@ class AIOHTTPSource(uproot.source.chunk.Source):
         self._submit_async(stop(self._aio_exit_event)).result()
         self._aio_thread.join()
 
-    async def get(self, start, stop, notifications=None):
+    async def _request(self, start, stop, timeout):
         async with self._session.get(
             self._file_path,
             headers={"Range": f"bytes={start}-{stop - 1}"},
             ssl=self._ssl_context,
+            timeout=aiohttp.ClientTimeout(total=timeout),
         ) as resp:
+            resp.raise_for_status()
             content = await resp.read()
+            if resp.status == 200 and len(content) != stop - start:
+                # server ignored the range header
+                content = content[start:stop]
+            return content
+
+    async def get(self, start, stop, notifications=None, deadline=None):
+        """
+        Request the byte range `start:stop`, retrying on failure. `deadline`
+        is the (event loop) time by which the request has to be finished.
+        """
+        loop = asyncio.get_running_loop()
+        for attempt in range(self._retries + 1):
+            try:
+                async with self._semaphore:
+                    timeout = self._timeout
+                    if deadline is not None:
+                        remaining = deadline - loop.time()
+                        timeout = remaining if timeout is None else min(timeout, remaining)
+                    if timeout is not None and timeout <= 0:
+                        raise asyncio.TimeoutError(
+                            f"Deadline exceeded for bytes {start}-{stop - 1} of {self._file_path}"
+                        )
+                    content = await self._request(start, stop, timeout)
+                future = uproot.source.futures.TrivialFuture(content)
+                break
+            except (aiohttp.ClientError, asyncio.TimeoutError) as err:
+                retry = (
+                    attempt < self._retries
+                    and not (deadline is not None and loop.time() >= deadline)
+                    and not (
+                        isinstance(err, aiohttp.ClientResponseError)
+                        and err.status not in RETRY_STATUS
+                    )
+                )
+                if not retry:
+                    future = FailedFuture(err)
+                    break
+                await asyncio.sleep(self._backoff * 2 ** attempt)
+        chunk = uproot.source.chunk.Chunk(self, start, stop, future)
+        if notifications is not None:
+            notifications.put(chunk)
+        return chunk
+
+    async def get_multi(self, ranges, notifications=None, deadline=None):
+        """
+        Request several byte ranges in one `multipart/byteranges` request.
+        Ranges not contained in the response are requested one by one.
+        """
+        chunks = {}
+
+        def put(start, stop, content):
             future = uproot.source.futures.TrivialFuture(content)
             chunk = uproot.source.chunk.Chunk(self, start, stop, future)
+            chunks[start, stop] = chunk
             if notifications is not None:
                 notifications.put(chunk)
-            return chunk
+
+        def put_contained(part_start, content):
+            # the server may merge or reorder ranges
+            part_stop = part_start + len(content)
+            for start, stop in ranges:
+                if (start, stop) in chunks:
+                    continue
+                if start >= part_start and stop <= part_stop:
+                    put(start, stop, content[start - part_start : stop - part_start])
+
+        timeout = self._timeout
+        if deadline is not None:
+            remaining = deadline - asyncio.get_running_loop().time()
+            timeout = remaining if timeout is None else min(timeout, remaining)
+        header = ", ".join(f"{start}-{stop - 1}" for start, stop in ranges)
+        single_part = False
+        try:
+            async with self._semaphore:
+                async with self._session.get(
+                    self._file_path,
+                    headers={"Range": f"bytes={header}"},
+                    ssl=self._ssl_context,
+                    timeout=aiohttp.ClientTimeout(total=timeout),
+                ) as resp:
+                    resp.raise_for_status()
+                    if resp.content_type == "multipart/byteranges":
+                        reader = aiohttp.MultipartReader.from_response(resp)
+                        async for part in reader:
+                            part_start = _content_range_start(part.headers)
+                            put_contained(part_start, await part.read())
+                    elif resp.status == 206:
+                        # single range response, e.g. if the server merged all ranges
+                        single_part = True
+                        put_contained(
+                            _content_range_start(resp.headers), await resp.read()
+                        )
+                    else:
+                        # server ignored the range header
+                        self._multirange = False
+        except (aiohttp.ClientError, asyncio.TimeoutError, KeyError, ValueError):
+            # the remaining ranges are requested (with retries) below
+            pass
+        missing = [(start, stop) for start, stop in ranges if (start, stop) not in chunks]
+        if single_part and missing:
+            # only the first range was served
+            self._multirange = False
+        for chunk in await asyncio.gather(
+            *[self.get(start, stop, notifications, deadline=deadline) for start, stop in missing]
+        ):
+            chunks[chunk.start, chunk.stop] = chunk
+        return [chunks[start, stop] for start, stop in ranges]
 
     def chunk(self, start, stop):
         return self._submit_async(self.get(start, stop)).result()
@@ -74,8 +240,39 @@ class AIOHTTPSource(uproot.source.chunk.Source):
     def chunks(self, ranges, notifications):
 
         async def achunks():
+            deadline = None
+            if self._deadline is not None:
+                deadline = asyncio.get_running_loop().time() + self._deadline
+            if self._multirange and len(ranges) > 1:
+                groups = [
+                    ranges[i : i + self._max_ranges]
+                    for i in range(0, len(ranges), self._max_ranges)
+                ]
+                # check support with the first request before sending the others
+                result = await self.get_multi(groups[0], notifications, deadline=deadline)
+                if not self._multirange:
+                    result.extend(
+                        await asyncio.gather(
+                            *[
+                                self.get(start, stop, notifications, deadline=deadline)
+                                for start, stop in ranges[len(result) :]
+                            ]
+                        )
+                    )
+                    return result
+                for chunks in await asyncio.gather(
+                    *[
+                        self.get_multi(group, notifications, deadline=deadline)
+                        for group in groups[1:]
+                    ]
+                ):
+                    result.extend(chunks)
+                return result
             return await asyncio.gather(
-                *[self.get(start, stop, notifications) for start, stop in ranges]
+                *[
+                    self.get(start, stop, notifications, deadline=deadline)
+                    for start, stop in ranges
+                ]
             )
 
         return self._submit_async(achunks()).result()
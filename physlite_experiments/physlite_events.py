@@ -4,15 +4,25 @@ encapsulating the full event data model, similar to coffea NanoEvents
 (see https://github.com/CoffeaTeam/coffea/tree/master/coffea/nanoevents)
 """
 
+import os
+import uuid
+import warnings
+import hashlib
 from copy import deepcopy
+from functools import lru_cache
 import json
 import uproot
 from uproot.interpretation.objects import CannotBeAwkward
 from uproot.interpretation.identify import UnknownInterpretation
 import awkward as ak
 import numpy as np
-from physlite_experiments.deserialization_hacks import branch_to_array
-from physlite_experiments.behavior import xAODParticle, xAODTrackParticle
+from physlite_experiments.deserialization_hacks import (
+    branch_to_array, branches_to_arrays, array_cache_key
+)
+from physlite_experiments.behavior import (
+    xAODParticle, xAODTrackParticle, _global_link_index
+)
+from physlite_experiments.utils import read_hash_dict
 import weakref
 
 behavior_dict = {
@@ -41,13 +51,9 @@ behavior_dict = {
 }
 
 
-def get_branch_names():
-
+@lru_cache(maxsize=None)
+def _branch_names_from_log():
     branch_names = {}
-
-    # TODO: parse this from MetaData/EventFormat once member wise splitting can
-    # be read from uproot
-    import os
     module_dir = os.path.dirname(__file__)
     with open(os.path.join(module_dir, "data/branch_names_hashes_log.txt")) as f:
         for l in f:
@@ -61,10 +67,35 @@ def get_branch_names():
                 continue
             branch_name, branch_hash = fields[5], fields[7]
             branch_names[int(branch_hash)] = branch_name
-
     return branch_names
 
 
+_branch_names_cache = {}
+
+
+def get_branch_names(uproot_file=None):
+    """
+    Get the hash to branch name mapping (used for ElementLinks) from the
+    EventFormat in the MetaData tree of `uproot_file` (memoized per file
+    UUID). Without a file, or if that can't be read, the mapping from
+    data/branch_names_hashes_log.txt is used.
+    """
+    if uproot_file is None:
+        return _branch_names_from_log()
+    if uproot_file.uuid not in _branch_names_cache:
+        try:
+            branch_names = read_hash_dict(uproot_file)
+        except (KeyError, IndexError, ValueError, UnicodeDecodeError) as err:
+            warnings.warn(
+                f"Can't read branch name hashes from MetaData, using defaults: {err!r}"
+            )
+            branch_names = {}
+        if len(branch_names) == 0:
+            branch_names = _branch_names_from_log()
+        _branch_names_cache[uproot_file.uuid] = branch_names
+    return _branch_names_cache[uproot_file.uuid]
+
+
 def get_branch_forms(uproot_tree):
     forms = {}
 
@@ -92,7 +123,17 @@ def get_branch_forms(uproot_tree):
     return forms
 
 
-def get_lazy_form(branch_forms):
+def get_lazy_form(branch_forms, local2global=True):
+    """
+    Form for `Factory` from the branch forms of `get_branch_forms`.
+
+    With `local2global=True` ElementLink records get an additional field
+    `globalIndex` - the index into the flattened target collection, computed
+    once per chunk by `LazyGet` (similar to `local2global` in NanoEvents)
+
+    The offsets of each collection are read from a branch with one number per
+    object if there is one (cheap to decode).
+    """
     def apply(parent_form, form, key, root_key):
         form = deepcopy(form)
         if form["class"] == "ListOffsetArray64":
@@ -106,11 +147,20 @@ def get_lazy_form(branch_forms):
                     field,
                     f"{root_key}%{field}",
                 )
+            if local2global and set(form["contents"]) == {"m_persKey", "m_persIndex"}:
+                form["contents"]["globalIndex"] = {
+                    "class": "NumpyArray",
+                    "itemsize": 8,
+                    "format": "l",
+                    "primitive": "int64",
+                    "form_key": f"{root_key}%!local2global%content",
+                }
         else:
             form["form_key"] = f"{root_key}%content"
         parent_form[key] = form
 
     form = {"class": "RecordArray", "contents": {}}
+    scalar_offsets = set()
 
     for key, ak_form in branch_forms.items():
         key_fields = key.split(".")
@@ -138,6 +188,12 @@ def get_lazy_form(branch_forms):
                         "__record__": behavior_dict[ak_top_key],
                     }
                     parameters["__record__"] = behavior_dict[ak_top_key]
+            if (
+                ak_top_key not in scalar_offsets
+                and form_dict["content"]["class"] == "NumpyArray"
+            ):
+                form["contents"][ak_top_key]["form_key"] = f"{key}%offsets"
+                scalar_offsets.add(ak_top_key)
             apply(
                 form["contents"][ak_top_key]["content"]["contents"],
                 form_dict["content"],
@@ -151,6 +207,57 @@ def get_lazy_form(branch_forms):
     return form
 
 
+def schema_fingerprint(uproot_tree):
+    """
+    Hash of the branch names and interpretations - trees with the same
+    fingerprint get the same form from `get_lazy_form`
+    """
+    fingerprint = hashlib.sha1()
+    for key, branch in uproot_tree.iteritems(filter_name="*AuxDyn.*"):
+        try:
+            interpretation = branch.interpretation.cache_key
+        except UnknownInterpretation:
+            interpretation = branch.typename
+        fingerprint.update(f"{key}:{interpretation}\n".encode())
+    return fingerprint.hexdigest()
+
+
+_form_cache = {}
+
+
+def cached_lazy_form(uproot_tree, directory=None, local2global=True):
+    """
+    `get_lazy_form(get_branch_forms(uproot_tree))` as json, cached in memory
+    and optionally in `directory` by `schema_fingerprint`.
+    """
+    fingerprint = schema_fingerprint(uproot_tree)
+    if not local2global:
+        fingerprint += "-nolocal2global"
+    if fingerprint in _form_cache:
+        return _form_cache[fingerprint]
+    path = None
+    if directory is not None:
+        path = os.path.join(directory, f"form-{fingerprint}.json")
+        if os.path.exists(path):
+            with open(path) as f:
+                form = f.read()
+            _form_cache[fingerprint] = form
+            return form
+    form = json.dumps(
+        get_lazy_form(get_branch_forms(uproot_tree), local2global=local2global)
+    )
+    _form_cache[fingerprint] = form
+    if path is not None:
+        os.makedirs(directory, exist_ok=True)
+        # write to a temporary file first and rename such that concurrent
+        # jobs never see partially written forms
+        tmp_path = f"{path}.tmp-{uuid.uuid4().hex}"
+        with open(tmp_path, "w") as f:
+            f.write(form)
+        os.replace(tmp_path, path)
+    return form
+
+
 def find_first_column(form, form_key=None):
     """
     Find first leave column in a form (used to define a column for loading offsets)
@@ -212,20 +319,76 @@ def recreate_form(form, form_key=None, level=0):
     return form
 
 
+def read_arrays(tree, keys, entry_start=None, entry_stop=None, disk_cache=None):
+    """
+    Read the arrays for the branches `keys` of the tree in the given entry
+    range, requesting the baskets of all branches at once (e.g. to prefetch
+    the columns for the next chunk in a background thread).
+
+    Returns a dictionary with the keys from `array_cache_key`
+    """
+    branches = [tree[key] for key in keys]
+    arrays = {}
+    if disk_cache is not None:
+        not_cached = []
+        for branch in branches:
+            array = disk_cache.load(disk_cache.key(branch, entry_start, entry_stop))
+            if array is None:
+                not_cached.append(branch)
+            else:
+                arrays[array_cache_key(branch, entry_start, entry_stop)] = array
+        branches = not_cached
+    for branch, array in zip(
+        branches,
+        branches_to_arrays(branches, entry_start=entry_start, entry_stop=entry_stop),
+    ):
+        if disk_cache is not None:
+            disk_cache.store(disk_cache.key(branch, entry_start, entry_stop), array)
+        arrays[array_cache_key(branch, entry_start, entry_stop)] = array
+    return arrays
+
+
 class LazyGet:
+    """
+    Container for `ak.from_buffers` that reads the branches of an uproot tree
+    on demand.
+
+    Optionally takes a future for `prefetched` arrays (e.g. from submitting
+    `read_arrays` to an executor) that will be put into the cache once the
+    first column is requested. The keys of all requested branches are recorded
+    in `touched_keys`.
+
+    Form keys marked with "!local2global" (see `get_lazy_form`) refer to the
+    index of ElementLinks into the flattened target collection, which is
+    computed from the offsets of the target collection (found via
+    `branch_names`, read from the branch for the collection offsets in `form`
+    - by default `cached_lazy_form(tree)`) and cached like the branches.
+    """
+
     def __init__(
         self,
         tree,
         verbose=False,
         cache=None,
         entry_start=None,
-        entry_stop=None
+        entry_stop=None,
+        disk_cache=None,
+        prefetched=None,
+        branch_names=None,
+        form=None,
     ):
         self.tree = tree
         self.verbose = verbose
         self.cache = cache
         self.entry_start = entry_start
         self.entry_stop = entry_stop
+        self.disk_cache = disk_cache
+        self.prefetched = prefetched
+        self.branch_names = branch_names
+        if isinstance(form, str):
+            form = json.loads(form)
+        self.form = form
+        self.touched_keys = {}
 
     def __getitem__(self, key):
         if self.verbose:
@@ -234,19 +397,11 @@ class LazyGet:
         attrs = key.split("%")
         key = attrs[0]
         attrs = attrs[1:]
-        if self.cache is not None and key in self.cache:
-            ar = self.cache[key]
+        if "!local2global" in attrs:
+            ar = self.local2global(key).layout
+            attrs = [attr for attr in attrs if attr != "!local2global"]
         else:
-            if self.verbose:
-                print("Cache miss for ", key)
-            ar = branch_to_array(
-                self.tree[key],
-                entry_start=self.entry_start,
-                entry_stop=self.entry_stop,
-            )
-        if self.cache is not None:
-            self.cache[key] = ar
-        ar = ar.layout
+            ar = self.array(key).layout
         for attr in attrs:
             if attr in ["content", "offsets"]:
                 ar = getattr(ar, attr)
@@ -255,10 +410,277 @@ class LazyGet:
         ar = np.asarray(ar)
         return ar
 
+    def array(self, key):
+        "Array of the branch `key` for the entry range (cached)"
+        self.touched_keys[key] = None
+        if self.prefetched is not None:
+            prefetched = self.prefetched.result()
+            self.prefetched = None
+            if self.cache is None:
+                self.cache = {}
+            self.cache.update(prefetched)
+        branch = self.tree[key]
+        # the key includes the file and entry range such that the cache can
+        # be shared between chunks and files
+        cache_key = array_cache_key(branch, self.entry_start, self.entry_stop)
+        if self.disk_cache is None:
+            # looks up and stores in `self.cache` (instead of the file's
+            # `array_cache` such that only `self.cache` holds the arrays)
+            ar = branch_to_array(
+                branch,
+                entry_start=self.entry_start,
+                entry_stop=self.entry_stop,
+                array_cache=self.cache,
+            )
+        else:
+            ar = None if self.cache is None else self.cache.get(cache_key)
+            if ar is None:
+                if self.verbose:
+                    print("Cache miss for ", key)
+                ar = self.disk_cache.branch_to_array(
+                    branch,
+                    entry_start=self.entry_start,
+                    entry_stop=self.entry_stop,
+                )
+        # arrays from uproot (no custom deserialization) are not stored yet
+        if self.cache is not None and cache_key not in self.cache:
+            self.cache[cache_key] = ar
+        return ar
+
+    def target_offsets(self, name):
+        "Offsets of the collection `name` (None if it's not in the form)"
+        if self.form is None:
+            self.form = json.loads(cached_lazy_form(self.tree))
+        collection = self.form["contents"].get(name.replace("Analysis", ""))
+        if collection is None or "form_key" not in collection:
+            return None
+        # the same branch as for the offsets of the collection in the events
+        key = collection["form_key"].split("%")[0]
+        offsets = np.asarray(self.array(key).layout.offsets)
+        return offsets - offsets[0]
+
+    def local2global(self, key):
+        """
+        Array of the ElementLinks of branch `key` with the index into the
+        flattened target collection instead of the link records (cached)
+        """
+        cache_key = (
+            array_cache_key(self.tree[key], self.entry_start, self.entry_stop)
+            + ":local2global"
+        )
+        if self.cache is not None and cache_key in self.cache:
+            return self.cache[cache_key]
+        if self.branch_names is None:
+            self.branch_names = get_branch_names(self.tree.file)
+        layout = ak.packed(self.array(key)).layout
+        offsets = []
+        link_event = np.arange(len(layout))
+        while hasattr(layout, "offsets"):
+            offsets.append(np.asarray(layout.offsets))
+            link_event = np.repeat(link_event, np.diff(offsets[-1]))
+            layout = layout.content
+        link_key = np.asarray(layout["m_persKey"]).astype(np.int64)
+        keys = []
+        target_offsets = []
+        for hash_key in np.unique(link_key):
+            if hash_key not in self.branch_names:
+                continue
+            offsets_for_key = self.target_offsets(self.branch_names[hash_key])
+            if offsets_for_key is not None:
+                keys.append(hash_key)
+                target_offsets.append(offsets_for_key.astype(np.int64))
+        # the same as `behavior.xAODEvents.element_link` without the
+        # globalIndex, but each collection starting at 0
+        out = ak.layout.NumpyArray(
+            _global_link_index(
+                link_event,
+                link_key,
+                np.asarray(layout["m_persIndex"]).astype(np.int64),
+                np.array(keys, dtype=np.int64),
+                np.array(target_offsets, dtype=np.int64).reshape(
+                    len(keys), len(offsets[0])
+                ),
+                np.zeros(len(keys), dtype=np.int64),
+            )
+        )
+        for level_offsets in reversed(offsets):
+            out = ak.layout.ListOffsetArray64(ak.layout.Index64(level_offsets), out)
+        out = ak.Array(out)
+        if self.cache is not None:
+            self.cache[cache_key] = out
+        return out
+
+
+def lazy_parquet(parquet_file, cache=None, **kwargs):
+    """
+    Open a parquet file lazily with `ak.from_parquet` and create the form for
+    `Factory` with `recreate_form`.
+
+    The result holds the open file(s), so it is only cached in `cache` (a
+    dict owned by the caller, e.g. for all chunks of one file while it is
+    open) per source and options.
+    """
+    key = ("lazy", repr(parquet_file), repr(sorted(kwargs.items())))
+    if cache is not None and key in cache:
+        return cache[key]
+    # the container keeps the columns of one chunk - no need to cache more
+    kwargs.setdefault("lazy_cache", None)
+    lazy = ak.from_parquet(parquet_file, lazy=True, **kwargs)
+    layout = lazy.layout
+    if isinstance(layout, ak.partition.PartitionedArray):
+        layout = layout.partitions[0]
+    form = json.dumps(recreate_form(json.loads(layout.form.tojson())))
+    if cache is not None:
+        cache[key] = lazy, form
+    return lazy, form
+
+
+class ParquetGet:
+    """
+    Container for `ak.from_buffers` that reads the columns of an entry range
+    of a lazy array from `ak.from_parquet` on demand. The range may span
+    several row groups/partitions.
+    """
+
+    def __init__(self, lazy, entry_start, entry_stop):
+        self.lazy = lazy
+        self.entry_start = entry_start
+        self.entry_stop = entry_stop
+        self.columns = {}
+
+    def column(self, key):
+        if key not in self.columns:
+            array = self.lazy[key][self.entry_start:self.entry_stop]
+            array = ak.materialized(array)
+            if isinstance(array.layout, ak.partition.PartitionedArray):
+                array = ak.repartition(array, None)
+            # offsets starting at 0 and no unused content
+            self.columns[key] = ak.packed(array)
+        return self.columns[key]
+
+    def __getitem__(self, key):
+        tokens = key.split("-")
+        part = tokens[0]
+        what = tokens[-1]
+        array_key = "-".join(tokens[1:-1])
+        out = self.column(tuple(array_key.split("%")[0].split(":"))).layout
+        if what == "offsets":
+            for _ in array_key.split("%")[2:]:
+                out = out.content
+            return out.offsets
+        elif what == "data":
+            while hasattr(out, "content"):
+                out = out.content
+            return out
+
+
+def _arrow_leaf_paths(arrow_type, path):
+    import pyarrow as pa
+
+    if pa.types.is_struct(arrow_type):
+        paths = []
+        for field in arrow_type:
+            paths.extend(_arrow_leaf_paths(field.type, path + (field.name,)))
+        return paths
+    elif pa.types.is_list(arrow_type) or pa.types.is_large_list(arrow_type):
+        return _arrow_leaf_paths(arrow_type.value_type, path)
+    else:
+        return [path]
+
+
+def parquet_file_info(parquet_file, cache=None):
+    """
+    Open a single parquet file with pyarrow. Returns the `ParquetFile`, a
+    dict that maps the field paths of the leaf columns (as used in the form
+    keys from `recreate_form`) to the parquet column names and the stop entry
+    of each row group.
+
+    Like for `lazy_parquet` the result is only cached in a `cache` owned by
+    the caller.
+    """
+    key = ("pyarrow", repr(parquet_file))
+    if cache is not None and key in cache:
+        return cache[key]
+    import pyarrow.parquet as pq
+
+    f = pq.ParquetFile(parquet_file)
+    paths = []
+    for field in f.schema_arrow:
+        paths.extend(_arrow_leaf_paths(field.type, (field.name,)))
+    # the leaf columns of the parquet schema are in the same order
+    columns = dict(zip(paths, [column.path for column in f.schema]))
+    stops = np.cumsum(
+        [f.metadata.row_group(i).num_rows for i in range(f.num_row_groups)]
+    )
+    if cache is not None:
+        cache[key] = f, columns, stops
+    return f, columns, stops
+
+
+class ParquetColumnGet:
+    """
+    Container for `ak.from_buffers` that reads the buffers for an entry range
+    of a single parquet file directly with pyarrow. Each form key (from
+    `recreate_form`) is translated into one leaf column, so only that column
+    is read from the row groups that overlap with the range (offsets are
+    taken from the column the form key points to). The buffers are returned
+    without copying from the arrow arrays where possible.
+    """
+
+    def __init__(self, parquet_file, entry_start, entry_stop, cache=None):
+        self.file, self.column_names, stops = parquet_file_info(parquet_file, cache=cache)
+        starts = np.concatenate([[0], stops[:-1]])
+        self.row_groups = [
+            i for i in range(len(stops))
+            if starts[i] < entry_stop and stops[i] > entry_start
+        ] or [0]
+        self.offset = entry_start - starts[self.row_groups[0]]
+        self.length = entry_stop - entry_start
+        self.columns = {}
+
+    def column(self, path):
+        import pyarrow as pa
+
+        if path not in self.columns:
+            table = self.file.read_row_groups(
+                self.row_groups, columns=[self.column_names[path]]
+            )
+            chunks = table.column(path[0]).chunks
+            # only copies if the range spans several row groups
+            array = chunks[0] if len(chunks) == 1 else pa.concat_arrays(chunks)
+            self.columns[path] = array.slice(self.offset, self.length)
+        return self.columns[path]
+
+    def __getitem__(self, key):
+        import pyarrow as pa
+
+        tokens = key.split("-")
+        part = tokens[0]
+        what = tokens[-1]
+        array_key = "-".join(tokens[1:-1])
+        path = tuple(array_key.split("%")[0].split(":"))
+        level = len(array_key.split("%")) - 1
+        array = self.column(path)
+        fields = list(path[1:])
+        depth = 0
+        while True:
+            if pa.types.is_list(array.type) or pa.types.is_large_list(array.type):
+                depth += 1
+                if what == "offsets" and depth == level:
+                    return array.offsets.to_numpy()
+                # offsets refer to the full (not sliced) values
+                array = array.values
+            elif pa.types.is_struct(array.type):
+                array = array.field(fields.pop(0))
+            else:
+                return array.to_numpy(zero_copy_only=False)
+
 
 class Factory:
-    def __init__(self, form, length, container, **kwargs):
-        self.branch_names = get_branch_names()
+    def __init__(self, form, length, container, branch_names=None, **kwargs):
+        if branch_names is None:
+            branch_names = get_branch_names()
+        self.branch_names = branch_names
         self.form = form
         self.length = length
         self.container = container
@@ -276,49 +698,101 @@ class Factory:
 
     @classmethod
     def from_tree(
-            cls, uproot_tree, verbose=False, entry_start=None, entry_stop=None
+            cls,
+            uproot_tree,
+            verbose=False,
+            entry_start=None,
+            entry_stop=None,
+            disk_cache=None,
+            local2global=True,
     ):
-        form = get_lazy_form(get_branch_forms(uproot_tree))
-        form = json.dumps(form)
+        form = cached_lazy_form(uproot_tree, local2global=local2global)
+        branch_names = get_branch_names(uproot_tree.file)
         container = LazyGet(
             uproot_tree,
             verbose=verbose,
             entry_start=entry_start,
             entry_stop=entry_stop,
             cache={},
+            disk_cache=disk_cache,
+            branch_names=branch_names,
+            form=form,
         )
         start = entry_start or 0
         stop = entry_stop or uproot_tree.num_entries
         length = stop - start
-        return cls(form, length, container)
+        return cls(form, length, container, branch_names=branch_names)
 
     @classmethod
-    def from_parquet(cls, parquet_file, **kwargs):
-        lazy = ak.from_parquet(parquet_file, lazy=True, **kwargs)
-        form = recreate_form(json.loads(lazy.layout.form.tojson()))
-
-        class Mapping:
-            def __getitem__(self, key):
-                tokens = key.split("-")
-                part = tokens[0]
-                what = tokens[-1]
-                array_key = "-".join(tokens[1:-1])
-                array = ak.materialized(lazy[tuple(array_key.split("%")[0].split(":"))])
-                out = array.layout
-                if isinstance(out, ak.partition.PartitionedArray):
-                    if len(out.partitions) > 1:
-                        raise ValueError("Can't deal with more than one partition")
-                    out = out.partitions[0]
-                if what == "offsets":
-                    for _ in array_key.split("%")[2:]:
-                        out = out.content
-                    return out.offsets
-                elif what == "data":
-                    while hasattr(out, "content"):
-                        out = out.content
-                    return out
-
-        return cls(form, len(lazy), Mapping())
+    def from_hdf5(cls, filename, group="awkward", entry_start=None, entry_stop=None, **kwargs):
+        """
+        Lazily read events written with `hdf5.HDF5Writer`. The file is owned
+        by the container - close it with `factory.container.close()`
+        """
+        from physlite_experiments.hdf5 import HDF5Container
+
+        container = HDF5Container.open(
+            filename,
+            group=group,
+            entry_start=entry_start,
+            entry_stop=entry_stop,
+            **kwargs
+        )
+        return cls(json.dumps(container.form), container.length, container)
+
+    @classmethod
+    def from_parquet(
+        cls, parquet_file, entry_start=None, entry_stop=None, cache=None, **kwargs
+    ):
+        """
+        Lazily read the entries `entry_start:entry_stop` from a parquet file
+        (or a directory/list of files - anything that `ak.from_parquet`
+        accepts), independent of the row groups/partitions. Pass the same
+        dict as `cache` when iterating over chunks of the same (open) file to
+        read the metadata only once. Further keyword arguments are passed to
+        `ak.from_parquet`.
+
+        For single files only the needed leaf columns are read with pyarrow
+        (see `ParquetColumnGet`).
+        """
+        lazy, form = lazy_parquet(parquet_file, cache=cache, **kwargs)
+        entry_start = 0 if entry_start is None else entry_start
+        entry_stop = len(lazy) if entry_stop is None else min(entry_stop, len(lazy))
+        single_file = not (
+            isinstance(parquet_file, (list, tuple))
+            or (isinstance(parquet_file, str) and os.path.isdir(parquet_file))
+        )
+        if single_file and kwargs.get("row_groups") is None:
+            container = ParquetColumnGet(
+                parquet_file, entry_start, entry_stop, cache=cache
+            )
+        else:
+            container = ParquetGet(lazy, entry_start, entry_stop)
+        return cls(form, entry_stop - entry_start, container)
+
+
+class _KeyRecorder:
+    "Container for `ak.from_buffers` that returns empty buffers and records the keys"
+
+    def __init__(self):
+        self.touched_keys = {}
+
+    def __getitem__(self, key):
+        part, key, component = key.split("-")
+        self.touched_keys[key.split("%")[0]] = None
+        # offsets need one entry even for zero events
+        return np.zeros(1 if component == "offsets" else 0, dtype=np.int64)
+
+
+def accessed_branches(form, func, branch_names=None):
+    """
+    Branch names accessed by `func(events)`, found by running it on zero
+    events of `form` (without reading anything)
+    """
+    container = _KeyRecorder()
+    events = Factory(form, 0, container, branch_names=branch_names).events
+    func(events)
+    return list(container.touched_keys)
 
 
 def physlite_events(uproot_tree, **kwargs):
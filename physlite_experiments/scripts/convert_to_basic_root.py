@@ -88,10 +88,10 @@ def filter_branch(branch):
     return True
 
 
-def read_physlite_flat(rootfile):
+def read_physlite_flat(rootfile, max_workers=None):
     f = uproot.open(rootfile)
     tree = f["CollectionTree"]
-    array_dict = tree_arrays(tree, filter_branch=filter_branch)
+    array_dict = tree_arrays(tree, filter_branch=filter_branch, max_workers=max_workers)
     d_exploded = {}
     for key, ak_array in array_dict.items():
         keys = ak_array.fields
@@ -164,20 +164,43 @@ def write_branch_dict_root(branch_dict, rootfile, entry_stop=None):
     f.Close()
 
 
+def lz4_available():
+    try:
+        import lz4.frame
+        import xxhash
+    except ImportError:
+        return False
+    return True
+
+
 def write_branch_dict_root_flat(branch_dict, rootfile, entry_stop=None, lz4=False):
+    """
+    Write branches with at most 2 levels of jagged arrays into a flat ROOT
+    tree:
+
+    - `n<Collection>`: number of objects for each collection
+    - `<branch>[n<Collection>]` for single-jagged branches
+    - `n<branch>`, `<branch>[n<branch>]` and `m<branch>[n<Collection>]` for the
+      flattened inner level, the data and the inner counts of double-jagged
+      branches (see `unflatten`)
+
+    The whole arrays are written at once with uproot, i.e. there is one
+    basket per branch. LZ4 compression needs the `lz4` and `xxhash` packages
+    (`pip install physlite_experiments[lz4]`).
+    """
 
     if lz4:
-        f = ROOT.TFile.Open(rootfile, "RECREATE", "", ROOT.CompressionSettings(ROOT.kLZ4, 1))
+        if not lz4_available():
+            raise ImportError(
+                "LZ4 compression needs the lz4 and xxhash packages "
+                "(pip install lz4 xxhash) - or use lz4=False"
+            )
+        compression = uproot.LZ4(1)
     else:
-        f = ROOT.TFile.Open(rootfile, "RECREATE")
-    tree = ROOT.TTree("tree", "tree")
-    tree.SetAutoFlush(3 * 1024 ** 3)
-
-    BUFSIZE = 10000
+        compression = uproot.ZLIB(1)
 
-    # create objects and branches
-    count_branches = {}
-    branch_objects = {}
+    collections = {}
+    flat = {}
     for branch_name, branch_array in branch_dict.items():
         typestr = str(ak.type(branch_array))
         nptype = typestr.split("*")[-1].strip()
@@ -199,91 +222,36 @@ def write_branch_dict_root_flat(branch_dict, rootfile, entry_stop=None, lz4=Fals
         ]:
             warnings.warn(f"Skipping {branch_name} (doesn't fit naming scheme)")
             continue
-        branch_objects[branch_name] = {}
+        if entry_stop is not None:
+            branch_array = branch_array[:entry_stop]
+        count_branch = branch_name.split(".")[0]
         if typestr.count("var") == 2:
-            branch_objects[branch_name]["nm"] = array(f"i", [0])
-            branch_objects[branch_name]["n"] = array(f"i", [0])
-            branch_objects[branch_name]["m"] = np.empty(BUFSIZE, dtype=np.int32)
-            branch_objects[branch_name]["data"] = np.empty(BUFSIZE, dtype=getattr(np, nptype))
+            # uproot creates the counter n<branch> for the flattened data
+            flat[branch_name] = ak.flatten(branch_array, axis=2)
+            collections.setdefault(count_branch, {})[f"m{branch_name}"] = (
+                ak.values_astype(ak.num(branch_array, axis=2), np.int32)
+            )
         elif typestr.count("var") == 1:
-            branch_objects[branch_name]["n"] = array(f"i", [0])
-            branch_objects[branch_name]["data"] = np.empty(BUFSIZE, dtype=getattr(np, nptype))
-        else:
-            branch_objects[branch_name]["data"] = array(f"{letter_dict_array[nptype]}", [0])
-
-        if "var" in typestr:
-            count_branch = branch_name.split(".")[0]
-            if not count_branch in count_branches:
-                # n-entries level 1
-                tree.Branch(
-                    f"n{count_branch}",
-                    branch_objects[branch_name]["n"],
-                    f"n{count_branch}/I",
-                )
-                count_branches[count_branch] = branch_objects[branch_name]["n"]
-            if typestr.count("var") == 1:
-                tree.Branch(
-                    branch_name,
-                    branch_objects[branch_name]["data"],
-                    f"{branch_name}[n{count_branch}]/{letter_dict_root[nptype]}"
-                )
-            if typestr.count("var") == 2:
-                # n-entries level 1 (flattened)
-                tree.Branch(
-                    f"n{branch_name}",
-                    branch_objects[branch_name]["nm"],
-                    f"n{branch_name}/I",
-                )
-                # data (also flattened)
-                tree.Branch(
-                    f"{branch_name}",
-                    branch_objects[branch_name]["data"],
-                    f"{branch_name}[n{branch_name}]/{letter_dict_root[nptype]}"
-                )
-                # n-entries level 2
-                # (length of count branch)
-                tree.Branch(
-                    f"m{branch_name}",
-                    branch_objects[branch_name]["m"],
-                    f"m{branch_name}[n{count_branch}]/I",
-                )
+            collections.setdefault(count_branch, {})[branch_name] = branch_array
         else:
-            tree.Branch(
-                f"{branch_name}",
-                branch_objects[branch_name]["data"],
-                f"{branch_name}/{letter_dict_root[nptype]}"
-            )
-
-    tree.SetBasketSize("*", 1024 ** 3)
-
-    # loop over entries and fill tree
-    nevents = len(next(iter(branch_dict.values())))
-    typestrings = [str(ak.type(i)) for i in branch_dict.values()]
-    for e in tqdm(range(nevents) if entry_stop is None else range(entry_stop)):
-        for ts, [bname, bval] in zip(typestrings, branch_dict.items()):
-            if not bname in branch_objects:
-                continue
-            event = bval[e]
-            if "var" in ts:
-                count_branch = bname.split(".")[0]
-                n = len(event)
-                count_branches[count_branch][0] = n
-            if ts.count("var") == 1:
-                branch_objects[bname]["data"][:n] = ak.to_numpy(event)
-            elif ts.count("var") == 2:
-                flat = ak.to_numpy(ak.flatten(event))
-                nm = len(flat)
-                branch_objects[bname]["nm"][0] = nm
-                branch_objects[bname]["data"][:nm] = flat
-                branch_objects[bname]["m"][:n] = ak.to_numpy(ak.num(event))
-            else:
-                branch_objects[bname]["data"][0] = event
-        tree.Fill()
-
-    tree.Write()
-    f.Close()
-
-    return tree
+            flat[branch_name] = ak.to_numpy(branch_array)
+
+    # jagged branches of the same collection are zipped such that uproot
+    # writes one common counter n<Collection>
+    arrays = {
+        collection: ak.zip(fields, depth_limit=2)
+        for collection, fields in collections.items()
+    }
+    arrays.update(flat)
+
+    with uproot.recreate(rootfile, compression=compression) as f:
+        f.mktree(
+            "tree",
+            {k: v.dtype if isinstance(v, np.ndarray) else ak.type(v) for k, v in arrays.items()},
+            counter_name=lambda counted: f"n{counted}",
+            field_name=lambda outer, inner: inner,
+        )
+        f["tree"].extend(arrays)
 
 
 def unflatten_double_jagged(branch_dict, key):
@@ -332,6 +300,9 @@ if __name__ == "__main__":
     branch_dict = read_physlite_flat("user.nihartma.22884623.EXT0._000001.DAOD_PHYSLITE.test.pool.root")
     for nentries in [1250, 2500, 5000, 10000]:
         for lz4 in [True, False]:
+            if lz4 and not lz4_available():
+                print("Skipping lz4 (needs the lz4 and xxhash packages)")
+                continue
             if lz4:
                 postfix = "lz4_"
             else:
@@ -1,18 +1,48 @@
 #!/usr/bin/env python
 
-import json
+import time
 import uproot
-import math
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import awkward as ak
 
 from physlite_experiments.physlite_events import (
-    physlite_events, get_lazy_form, get_branch_forms, Factory, LazyGet
+    physlite_events, cached_lazy_form, get_branch_names, Factory, LazyGet, read_arrays,
+    lazy_parquet, accessed_branches,
 )
 from physlite_experiments.analysis_example import get_obj_sel
-from physlite_experiments.utils import subdivide
+from physlite_experiments.utils import basket_aligned_chunks
 
 
-def run(filename, max_chunksize=10000, http_handler=uproot.MultithreadedHTTPSource):
+def run(
+    filename,
+    max_chunksize=10000,
+    http_handler=uproot.MultithreadedHTTPSource,
+    source_options=None,
+    disk_cache=None,
+    cache=None,
+    prefetch=False,
+    entry_start=None,
+    entry_stop=None,
+    chunk_bytes=None,
+    form_cache=None,
+):
+    """
+    Run the example analysis on a DAOD_PHYSLITE file (or the entries
+    `entry_start:entry_stop` of it) in chunks of about `max_chunksize` events
+    (or `chunk_bytes` uncompressed bytes), aligned to the basket boundaries
+    (see `utils.basket_aligned_chunks`). Optionally, a `cache` for decoded columns (e.g.
+    `cache.LRUColumnCache`) can be shared between chunks and files - by default
+    a new dict is used for each chunk.
+
+    With `prefetch` (a list of branch names or True for using the branches
+    accessed in the first chunk) the columns for the next chunk are read in a
+    background thread while the current one is processed.
+
+    `source_options` are passed on to the `http_handler` (via `uproot.open`).
+
+    Forms are cached for files with the same branches and interpretations,
+    optionally also in the directory `form_cache`.
+    """
     output = {
         collection: {
             flag : 0
@@ -20,41 +50,182 @@ def run(filename, max_chunksize=10000, http_handler=uproot.MultithreadedHTTPSour
         } for collection in ["Electrons", "Muons", "Jets"]
     }
     nevents = 0
+    # decoded columns are only kept in `cache`
     with uproot.open(
         f"{filename}:CollectionTree",
         xrootd_handler=uproot.XRootDSource,
         http_handler=http_handler,
+        array_cache=None,
+        **(source_options or {}),
     ) as tree:
-        if max_chunksize is not None and tree.num_entries > max_chunksize:
-            n_chunks = math.ceil(tree.num_entries / max_chunksize)
+        form = cached_lazy_form(tree, directory=form_cache)
+        if isinstance(prefetch, (list, tuple)):
+            prefetch_keys = list(prefetch)
         else:
-            n_chunks = 1
-        form = json.dumps(get_lazy_form(get_branch_forms(tree)))
-        entry_start = 0
-        for num_entries in subdivide(tree.num_entries, n_chunks):
-            print("Processing", num_entries, "entries")
-            entry_stop = entry_start + num_entries
-            cache = {}
-            container = LazyGet(
-                tree, entry_start=entry_start, entry_stop=entry_stop,
-                cache=cache
-            )
-            factory = Factory(form, entry_stop - entry_start, container)
-            events = factory.events
-            events_decorated = get_obj_sel(events)
-            entry_start = entry_stop
-            for collection in output:
-                for flag in output[collection]:
-                    output[collection][flag] += ak.count_nonzero(
-                        events_decorated[collection][flag]
-                    )
-            nevents += len(events)
+            prefetch_keys = None
+        chunks = basket_aligned_chunks(
+            _plan_branches(tree, prefetch_keys, form=form),
+            entry_start,
+            entry_stop,
+            chunk_entries=max_chunksize,
+            chunk_bytes=chunk_bytes,
+        )
+        prefetched = {}
+        with ThreadPoolExecutor(1) as executor:
+            for i, (entry_start, entry_stop) in enumerate(chunks):
+                print("Processing", entry_stop - entry_start, "entries")
+                if prefetch_keys is not None:
+                    for j in [i, i + 1]:
+                        if j < len(chunks) and j not in prefetched:
+                            prefetched[j] = executor.submit(
+                                read_arrays,
+                                tree,
+                                prefetch_keys,
+                                *chunks[j],
+                                disk_cache=disk_cache,
+                            )
+                branch_names = get_branch_names(tree.file)
+                container = LazyGet(
+                    tree, entry_start=entry_start, entry_stop=entry_stop,
+                    cache={} if cache is None else cache, disk_cache=disk_cache,
+                    prefetched=prefetched.pop(i, None), branch_names=branch_names,
+                    form=form,
+                )
+                factory = Factory(
+                    form, entry_stop - entry_start, container,
+                    branch_names=branch_names,
+                )
+                events = factory.events
+                events_decorated = get_obj_sel(events)
+                for collection in output:
+                    for flag in output[collection]:
+                        output[collection][flag] += ak.count_nonzero(
+                            events_decorated[collection][flag]
+                        )
+                nevents += len(events)
+                if prefetch is True and prefetch_keys is None:
+                    prefetch_keys = list(container.touched_keys)
     return output, nevents
 
 
-def run_parquet(filename):
-    import pyarrow.parquet as pq
+def _plan_branches(tree, keys=None, form=None):
+    """
+    Branches used for aligning chunks - the given keys or the ones accessed
+    by `get_obj_sel` (see `accessed_branches`)
+    """
+    if not keys:
+        if form is None:
+            form = cached_lazy_form(tree)
+        keys = accessed_branches(form, get_obj_sel, get_branch_names(tree.file))
+    return [tree[key] for key in keys]
+
+
+def merge_outputs(output, other):
+    "Add up the (nested) counter dicts returned by `run`"
+    for key, value in other.items():
+        if isinstance(value, dict):
+            merge_outputs(output.setdefault(key, {}), value)
+        else:
+            output[key] = output.get(key, 0) + value
+    return output
+
+
+def work_units(
+    filenames,
+    unit_size=100000,
+    http_handler=uproot.MultithreadedHTTPSource,
+    source_options=None,
+    keys=None,
+):
+    """
+    Split each file into (filename, entry_start, entry_stop) of about
+    `unit_size` entries, aligned to the basket boundaries
+    """
+    units = []
+    for filename in filenames:
+        with uproot.open(
+            f"{filename}:CollectionTree",
+            xrootd_handler=uproot.XRootDSource,
+            http_handler=http_handler,
+            **(source_options or {}),
+        ) as tree:
+            for entry_start, entry_stop in basket_aligned_chunks(
+                _plan_branches(tree, keys), chunk_entries=unit_size
+            ):
+                units.append((filename, entry_start, entry_stop))
+    return units
 
+
+def _run_unit(filename, entry_start, entry_stop, **kwargs):
+    start = time.time()
+    output, nevents = run(
+        filename, entry_start=entry_start, entry_stop=entry_stop, **kwargs
+    )
+    return output, nevents, time.time() - start
+
+
+def process(filenames, unit_size=100000, executor=None, max_workers=None, **kwargs):
+    """
+    Run the example analysis on several files in parallel. Each file is split
+    into basket-aligned work units of about `unit_size` entries which are
+    submitted to `executor` - anything with a `submit` method returning
+    futures, e.g. a `concurrent.futures` executor or a dask `Client`. By
+    default a `ProcessPoolExecutor` with `max_workers` processes is used.
+
+    Further keyword arguments are passed to `run` (they need to be picklable,
+    so don't pass an in-memory `cache` and use `source_options` instead of
+    locally defined `http_handler` classes).
+
+    Returns the merged counters, the number of events and a list with the
+    timing of each unit.
+    """
+    prefetch = kwargs.get("prefetch")
+    units = work_units(
+        filenames,
+        unit_size=unit_size,
+        http_handler=kwargs.get("http_handler", uproot.MultithreadedHTTPSource),
+        source_options=kwargs.get("source_options"),
+        keys=list(prefetch) if isinstance(prefetch, (list, tuple)) else None,
+    )
+    own_executor = executor is None
+    if own_executor:
+        executor = ProcessPoolExecutor(max_workers)
+    try:
+        futures = [executor.submit(_run_unit, *unit, **kwargs) for unit in units]
+        output = {}
+        nevents = 0
+        report = []
+        for (filename, entry_start, entry_stop), future in zip(units, futures):
+            unit_output, unit_nevents, unit_time = future.result()
+            merge_outputs(output, unit_output)
+            nevents += unit_nevents
+            report.append(
+                {
+                    "filename": filename,
+                    "entry_start": entry_start,
+                    "entry_stop": entry_stop,
+                    "time": unit_time,
+                }
+            )
+    finally:
+        if own_executor:
+            executor.shutdown()
+    return output, nevents, report
+
+
+def run_parquet(filename, max_chunksize=None):
+    """
+    Run the example analysis on a parquet file in chunks of `max_chunksize`
+    events (by default one chunk per row group)
+    """
+    if filename.startswith("http"):
+        import fsspec
+        with fsspec.open(filename, "rb", cache_type="none") as of:
+            return _run_parquet(of, max_chunksize)
+    return _run_parquet(filename, max_chunksize)
+
+
+def _run_parquet(parquet_file, max_chunksize=None):
     output = {
         collection: {
             flag : 0
@@ -62,17 +233,20 @@ def run_parquet(filename):
         } for collection in ["Electrons", "Muons", "Jets"]
     }
     nevents = 0
-    if filename.startswith("http"):
-        import fsspec
-        with fsspec.open(filename, "rb", cache_type="none") as of:
-            f = pq.ParquetFile(of)
-            parquet_file = of
+    # only valid while the file is open
+    cache = {}
+    lazy, form = lazy_parquet(parquet_file, cache=cache)
+    if max_chunksize is not None:
+        stops = list(range(max_chunksize, len(lazy), max_chunksize)) + [len(lazy)]
+    elif isinstance(lazy.layout, ak.partition.PartitionedArray):
+        stops = lazy.layout.stops
     else:
-        f = pq.ParquetFile(filename)
-        parquet_file = filename
-    for row_group in range(f.num_row_groups):
-        print("Processing row group", row_group)
-        events = Factory.from_parquet(parquet_file, row_groups=row_group).events
+        stops = [len(lazy)]
+    for entry_start, entry_stop in zip([0] + stops[:-1], stops):
+        print("Processing entries", entry_start, "to", entry_stop)
+        events = Factory.from_parquet(
+            parquet_file, entry_start=entry_start, entry_stop=entry_stop, cache=cache
+        ).events
         events_decorated = get_obj_sel(events)
         for collection in output:
             for flag in output[collection]:
@@ -85,40 +259,100 @@ def run_parquet(filename):
     return output, nevents
 
 
-
 if __name__ == "__main__":
 
     import argparse
-    import time
 
     parser = argparse.ArgumentParser()
     parser.add_argument("input_files")
-    parser.add_argument("--max-chunksize", help="only for root files - process this number of events at once", type=int)
-    parser.add_argument("--multirange", help="use multirange requests for HTTP", default=False, action="store_true")
+    parser.add_argument("--max-chunksize", help="process about this number of events at once (by default one row group for parquet files)", type=int)
+    parser.add_argument("--chunk-bytes", help="only for root files - process about this number of (uncompressed) bytes at once", type=float)
+    parser.add_argument("--multirange", help="use multirange requests for HTTP (also with --aiohttp)", default=False, action="store_true")
     parser.add_argument("--aiohttp", help="use experimental AIOHTTPSource for HTTP", default=False, action="store_true")
+    parser.add_argument("--max-ranges", help="maximum number of ranges per request when running with aiohttp and --multirange", default=100, type=int)
     parser.add_argument("--aio-num-connections", help="use this number of TCP connections when running with aiohttp", default=10, type=int)
+    parser.add_argument("--disk-cache", help="only for root files - cache decoded columns in this directory")
+    parser.add_argument("--prefetch", help="only for root files - read the columns accessed in the first chunk for the next chunk in the background", default=False, action="store_true")
+    parser.add_argument("--form-cache", help="only for root files - cache the forms for files with the same schema in this directory")
+    parser.add_argument("--cache-size", help="only for root files - share an in-memory column cache of this size (in MB) between chunks and files", type=float)
+    parser.add_argument("--workers", help="only for root files - process all files in parallel with this number of processes", type=int)
+    parser.add_argument("--unit-size", help="number of entries per work unit when running with --workers", default=100000, type=int)
     opts = parser.parse_args()
 
+    source_options = None
     if opts.aiohttp:
-        from physlite_experiments.io import AIOHTTPSource as AIOHTTPSourceBase
-
-        class AIOHTTPSource(AIOHTTPSourceBase):
-
-            def __init__(self, *args, **kwargs):
-                super().__init__(*args, tcp_connection_limit=opts.aio_num_connections, **kwargs)
+        from physlite_experiments.io import AIOHTTPSource
 
         http_handler = AIOHTTPSource
+        # passed on by uproot.open - unlike a locally defined subclass this
+        # can be pickled for the worker processes
+        source_options = dict(
+            tcp_connection_limit=opts.aio_num_connections,
+            multirange=opts.multirange,
+            max_ranges=opts.max_ranges,
+        )
     elif opts.multirange:
         http_handler = uproot.HTTPSource
     else:
         http_handler = uproot.MultithreadedHTTPSource
 
+    if opts.disk_cache is not None:
+        from physlite_experiments.cache import DiskCache
+        disk_cache = DiskCache(opts.disk_cache)
+    else:
+        disk_cache = None
+
+    if opts.cache_size is not None:
+        from physlite_experiments.cache import LRUColumnCache
+        cache = LRUColumnCache(int(opts.cache_size * 1024 ** 2))
+    else:
+        cache = None
+
     # The replacement for &amp; is a workaround for some http urls in panda
-    for filename in opts.input_files.replace(r"&amp;", r"&").split(","):
+    filenames = opts.input_files.replace(r"&amp;", r"&").split(",")
+
+    if opts.workers is not None:
+        start = time.time()
+        output, nevents, report = process(
+            [filename for filename in filenames if not filename.endswith(".parquet")],
+            unit_size=opts.unit_size,
+            max_workers=opts.workers,
+            max_chunksize=opts.max_chunksize,
+            chunk_bytes=opts.chunk_bytes,
+            form_cache=opts.form_cache,
+            http_handler=http_handler,
+            source_options=source_options,
+            disk_cache=disk_cache,
+            prefetch=opts.prefetch,
+        )
+        for unit in report:
+            print(
+                f"{unit['filename']} [{unit['entry_start']}:{unit['entry_stop']}] "
+                f"took {unit['time']:.2f} seconds"
+            )
+        print((output, nevents))
+        print(f"Took {time.time() - start:.2f} seconds")
+        filenames = [filename for filename in filenames if filename.endswith(".parquet")]
+
+    for filename in filenames:
         print("Processing", filename)
         start = time.time()
         if filename.endswith(".parquet"):
-            print(run_parquet(filename))
+            print(run_parquet(filename, max_chunksize=opts.max_chunksize))
         else:
-            print(run(filename, max_chunksize=opts.max_chunksize, http_handler=http_handler))
+            print(
+                run(
+                    filename,
+                    max_chunksize=opts.max_chunksize,
+                    chunk_bytes=opts.chunk_bytes,
+                    form_cache=opts.form_cache,
+                    http_handler=http_handler,
+                    source_options=source_options,
+                    disk_cache=disk_cache,
+                    cache=cache,
+                    prefetch=opts.prefetch,
+                )
+            )
         print(f"Took {time.time() - start:.2f} seconds")
+        if cache is not None:
+            print(cache)
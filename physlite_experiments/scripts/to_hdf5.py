@@ -0,0 +1,49 @@
+#!/usr/bin/env python
+
+import time
+import uproot
+from physlite_experiments.physlite_events import Factory, get_branch_forms
+from physlite_experiments.hdf5 import HDF5Writer
+from physlite_experiments.utils import basket_aligned_chunks
+
+
+def to_hdf5(input_daod, output_hdf5, chunk_entries=10000, entry_stop=None, **kwargs):
+    """
+    Convert the collections of `physlite_events` in basket-aligned chunks of
+    about `chunk_entries` entries. Further keyword arguments are passed to
+    `HDF5Writer`.
+    """
+    with uproot.open(f"{input_daod}:CollectionTree") as tree, HDF5Writer(
+        output_hdf5, **kwargs
+    ) as writer:
+        branches = [tree[key] for key in get_branch_forms(tree)]
+        start_time = time.time()
+        for start, stop in basket_aligned_chunks(
+            branches, entry_stop=entry_stop, chunk_entries=chunk_entries
+        ):
+            # the ElementLink global indices are only valid within a chunk
+            events = Factory.from_tree(
+                tree, entry_start=start, entry_stop=stop, local2global=False
+            ).events
+            writer.write(events)
+            print(
+                f"Wrote entries {start}-{stop}, "
+                f"{stop / (time.time() - start_time):.1f} events/s"
+            )
+
+
+if __name__ == "__main__":
+
+    import argparse
+    parser = argparse.ArgumentParser(description="Convert the collections in DAOD_PHYSLITE to HDF5")
+    parser.add_argument("input_daod", help="input daod path")
+    parser.add_argument("output_hdf5", help="output hdf5 filename/path")
+    parser.add_argument("--chunk-entries", help="convert about this number of entries at once", type=int, default=10000)
+    parser.add_argument("--entry-stop", help="only convert up to this number of entries", type=int)
+    parser.add_argument("--compression", help="h5py compression filter (e.g. lzf, gzip or none)", default="lzf")
+    args = parser.parse_args()
+
+    if args.compression == "none":
+        args.compression = None
+
+    to_hdf5(**vars(args))
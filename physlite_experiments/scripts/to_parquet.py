@@ -1,26 +1,80 @@
 #!/usr/bin/env python
 
-import math
+import time
 import awkward as ak
 import uproot
-from physlite_experiments.utils import filter_name, zip_physlite, subdivide
+from physlite_experiments.utils import filter_name, zip_physlite, basket_aligned_chunks
 
 # this hack won't be needed anymore when uproot uses awkward forth
 # see https://github.com/scikit-hep/awkward-1.0/pull/661
 from physlite_experiments.deserialization_hacks import tree_arrays
 
 
-def to_ak(root_filename, zip=False, verbose=False):
+def _get_filter(verbose=False):
     if verbose:
-        new_filter = lambda name: filter_name(name, verbose=True)
+        return lambda name: filter_name(name, verbose=True)
     else:
-        new_filter = filter_name
+        return filter_name
+
+
+def _tree_to_ak(
+    tree, zip=False, verbose=False, entry_start=None, entry_stop=None, max_workers=None
+):
+    array = tree_arrays(
+        tree,
+        filter_name=_get_filter(verbose),
+        entry_start=entry_start,
+        entry_stop=entry_stop,
+        max_workers=max_workers,
+    )
+    if zip:
+        return zip_physlite(array)
+    else:
+        return ak.zip(array, depth_limit=1)
+
+
+def to_ak(root_filename, zip=False, verbose=False, max_workers=None):
     with uproot.open(f"{root_filename}:CollectionTree") as tree:
-        array = tree_arrays(tree, filter_name=new_filter)
-        if zip:
-            return zip_physlite(array)
-        else:
-            return ak.zip(array, depth_limit=1)
+        return _tree_to_ak(tree, zip=zip, verbose=verbose, max_workers=max_workers)
+
+
+def iter_ak(
+    root_filename,
+    zip=False,
+    verbose=False,
+    chunk_entries=10000,
+    chunk_bytes=None,
+    entry_stop=None,
+    max_workers=None,
+):
+    """
+    Iterate over basket-aligned entry ranges of about `chunk_entries` entries
+    (or `chunk_bytes` uncompressed bytes), yielding (entry_start, entry_stop,
+    array) for each.
+    """
+    with uproot.open(f"{root_filename}:CollectionTree") as tree:
+        branches = [
+            branch
+            for branch in tree.values(filter_name=filter_name)
+            if len(branch.branches) == 0
+        ]
+        chunks = basket_aligned_chunks(
+            branches,
+            entry_stop=entry_stop,
+            chunk_entries=chunk_entries,
+            chunk_bytes=chunk_bytes,
+        )
+        for i, (start, stop) in enumerate(chunks):
+            array = _tree_to_ak(
+                tree,
+                zip=zip,
+                # print skipped branches only once
+                verbose=verbose and i == 0,
+                entry_start=start,
+                entry_stop=stop,
+                max_workers=max_workers,
+            )
+            yield start, stop, array
 
 
 def to_parquet(
@@ -28,17 +82,63 @@ def to_parquet(
         output_parquet,
         zip=False,
         verbose=False,
-        max_partition_size=None,
+        max_partition_size=10000,
+        max_partition_bytes=None,
+        entry_stop=None,
+        max_workers=None,
+        explode_records=False,
+        list_to32=False,
+        string_to32=True,
+        bytestring_to32=True,
         **kwargs
 ):
-    entry_stop = kwargs.pop("entry_stop", None)
-    ar = to_ak(input_daod, zip=zip, verbose=verbose)
-    if entry_stop is not None:
-        ar = ar[:entry_stop]
-    if max_partition_size is not None and len(ar) > max_partition_size:
-        npartitions = math.ceil(len(ar) / max_partition_size)
-        ar = ak.repartition(ar, subdivide(len(ar), npartitions))
-    ak.to_parquet(ar, output_parquet, **kwargs)
+    """
+    Convert in a streaming way - each basket-aligned chunk of about
+    `max_partition_size` entries (or `max_partition_bytes` uncompressed bytes)
+    is converted and written as one row group, so memory usage is bounded by
+    the chunk size. Further keyword arguments are passed to
+    `pyarrow.parquet.ParquetWriter`.
+    """
+    import pyarrow.parquet as pq
+
+    writer = None
+    start_time = time.time()
+    nevents = 0
+    nbytes = 0
+    try:
+        for entry_start, entry_stop, array in iter_ak(
+            input_daod,
+            zip=zip,
+            verbose=verbose,
+            chunk_entries=max_partition_size,
+            chunk_bytes=max_partition_bytes,
+            entry_stop=entry_stop,
+            max_workers=max_workers,
+        ):
+            table = ak.to_arrow_table(
+                array,
+                explode_records=explode_records,
+                list_to32=list_to32,
+                string_to32=string_to32,
+                bytestring_to32=bytestring_to32,
+            )
+            if writer is None:
+                writer = pq.ParquetWriter(output_parquet, table.schema, **kwargs)
+            elif not table.schema.equals(writer.schema):
+                # e.g. different nullability if a chunk happens to have no missing values
+                table = table.cast(writer.schema)
+            writer.write_table(table)
+            nevents += entry_stop - entry_start
+            nbytes += table.nbytes
+            elapsed = time.time() - start_time
+            print(
+                f"Wrote entries {entry_start}-{entry_stop}, "
+                f"{nevents / elapsed:.1f} events/s, "
+                f"{nbytes / elapsed / 1024 ** 2:.1f} MB/s (uncompressed)"
+            )
+    finally:
+        if writer is not None:
+            writer.close()
 
 
 if __name__ == "__main__":
@@ -50,7 +150,9 @@ if __name__ == "__main__":
     parser.add_argument("--zip", action="store_true", help="zip Collections (e.g. group Electrons, Muons, Jets)")
     parser.add_argument("-v", "--verbose", action="store_true", help="Print all skipped branches")
     parser.add_argument("--entry-stop", help="only convert up to this number of entries", type=int)
-    parser.add_argument("--max-partition-size", help="subdivide into row groups of maximum this size", type=int)
+    parser.add_argument("--max-partition-size", help="subdivide into row groups of about this number of entries", type=int, default=10000)
+    parser.add_argument("--max-partition-bytes", help="subdivide into row groups of about this number of (uncompressed) bytes", type=float)
+    parser.add_argument("--max-workers", help="decode branches in parallel with this number of threads", type=int)
     args = parser.parse_args()
 
     to_parquet(**vars(args))
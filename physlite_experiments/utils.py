@@ -1,4 +1,6 @@
 import os
+import math
+import numpy as np
 import awkward as ak
 import uproot
 
@@ -88,3 +90,107 @@ def subdivide(l, n):
     same sized chunks (like in numpy.array_split)
     """
     return [l // n + 1] * (l % n) + [l // n] * (n - l % n)
+
+
+def basket_aligned_chunks(
+    branches, entry_start=None, entry_stop=None, chunk_entries=None, chunk_bytes=None
+):
+    """
+    Split the entries `entry_start:entry_stop` of the given branches into
+    chunks of approximately `chunk_entries` entries or `chunk_bytes`
+    (uncompressed) bytes, such that as few baskets as possible are split
+    between chunks (split baskets have to be read and decompressed for both
+    chunks).
+
+    Chunk boundaries are chosen from the basket boundaries of all branches
+    within 0.5 to 1.5 times the target size. At each step the boundary that
+    splits the least compressed bytes is taken - if there is a boundary
+    common to all branches, that one. Ties are decided by the distance to the
+    target size.
+
+    Returns a list of (entry_start, entry_stop) tuples.
+    """
+    # branches without baskets (e.g. parents of split branches) don't matter
+    branches = [b for b in branches if b.num_baskets > 0]
+    if len(branches) == 0:
+        raise ValueError("Need at least one branch to plan chunks")
+    num_entries = branches[0].num_entries
+    entry_start = 0 if entry_start is None else entry_start
+    entry_stop = num_entries if entry_stop is None else entry_stop
+    if chunk_bytes is not None:
+        bytes_per_entry = sum(b.uncompressed_bytes for b in branches) / max(num_entries, 1)
+        target = max(1, int(chunk_bytes / max(bytes_per_entry, 1e-9)))
+        if chunk_entries is not None:
+            target = min(target, chunk_entries)
+    elif chunk_entries is not None:
+        target = chunk_entries
+    else:
+        return [(entry_start, entry_stop)]
+
+    offsets = [np.array(b.entry_offsets, dtype=np.int64) for b in branches]
+    basket_bytes = [
+        np.array(
+            [b.basket_compressed_bytes(i) for i in range(b.num_baskets)],
+            dtype=np.int64,
+        )
+        for b in branches
+    ]
+    candidates = np.unique(np.concatenate(offsets))
+    candidates = candidates[(candidates > entry_start) & (candidates < entry_stop)]
+    # cost of cutting at each candidate: bytes of the baskets that get split
+    cost = np.zeros(len(candidates), dtype=np.int64)
+    for branch_offsets, branch_bytes in zip(offsets, basket_bytes):
+        index = np.searchsorted(branch_offsets, candidates, side="right") - 1
+        split = branch_offsets[index] != candidates
+        cost[split] += branch_bytes[index[split]]
+
+    chunks = []
+    start = entry_start
+    while entry_stop - start > 1.5 * target:
+        lo = np.searchsorted(candidates, start + math.ceil(0.5 * target))
+        hi = np.searchsorted(candidates, start + int(1.5 * target), side="right")
+        if lo == hi:
+            # no basket boundary in the window
+            stop = start + target
+        else:
+            window = slice(lo, hi)
+            distance = np.abs(candidates[window] - (start + target))
+            best = np.lexsort((distance, cost[window]))[0]
+            stop = int(candidates[lo + best])
+        chunks.append((start, stop))
+        start = stop
+    chunks.append((start, entry_stop))
+    return chunks
+
+
+def read_strings(data, start=6):
+    ns = np.frombuffer(data[start: start + 4].tobytes(), dtype=">i4")[0]
+    pos = start + 4
+    strings = []
+    for i in range(ns):
+        nc = data[pos]
+        pos += 1
+        strings.append(data[pos: pos + nc].tobytes())
+        pos += nc
+    return strings, pos
+
+
+def hash_dict(data):
+    """
+    hash to branchname mapping from the (memberwise split) data of the
+    EventFormat branch - can't be read with uproot yet
+    (see https://github.com/scikit-hep/uproot5/issues/38)
+    """
+    branch_names, p = read_strings(data, start=6)
+    container_names, p = read_strings(data, start=p + 6)
+    _, p = read_strings(data, start=p + 6)
+    hashes = np.frombuffer(data[p + 10:].tobytes(), dtype=">u4")
+    return dict(zip(hashes, [i.decode() for i in branch_names]))
+
+
+def read_hash_dict(f):
+    "hash to branchname mapping from an opened uproot file"
+    metadata = f["MetaData"]
+    branchname = [k for k in metadata.keys() if "EventFormat" in k][0]
+    data = metadata[branchname].basket(0).data
+    return {int(k): str(v) for k, v in hash_dict(data).items()}
@@ -15,6 +15,10 @@ setup(
         "coffea>=0.7",
         "aiohttp",
     ],
+    extras_require={
+        # LZ4 compression for writing ROOT files with uproot
+        "lz4": ["lz4", "xxhash"],
+    },
     python_requires=">=3.5",
     author="Nikolai Hartmann",
     author_email="nihartma@cern.ch",
@@ -0,0 +1,136 @@
+import queue
+import asyncio
+import threading
+import pytest
+import aiohttp
+from aiohttp import web
+from physlite_experiments.io import AIOHTTPSource
+
+DATA = bytes(range(256)) * 100
+
+
+@pytest.fixture
+def server():
+    "Local stand-in for an HTTP server with range requests that can be told to fail"
+    state = {"fail": 0, "requests": 0, "ranges": [], "multipart": True, "merge": False}
+
+    async def handler(request):
+        state["requests"] += 1
+        if state["fail"] > 0:
+            state["fail"] -= 1
+            return web.Response(status=503)
+        ranges = [
+            (int(start), int(stop) + 1)
+            for start, stop in (
+                r.split("-") for r in request.headers["Range"][6:].split(",")
+            )
+        ]
+        state["ranges"].append(ranges)
+        if len(ranges) == 1 or state["merge"]:
+            # merged into one range (or only the first one with "first")
+            start, stop = ranges[0][0], max(stop for _, stop in ranges)
+            if state["merge"] == "first":
+                stop = ranges[0][1]
+            return web.Response(
+                body=DATA[start:stop],
+                status=206,
+                headers={"Content-Range": f"bytes {start}-{stop - 1}/{len(DATA)}"},
+            )
+        if not state["multipart"]:
+            return web.Response(body=DATA, status=200)
+        writer = aiohttp.MultipartWriter("byteranges")
+        for start, stop in ranges:
+            writer.append(
+                DATA[start:stop],
+                {
+                    "Content-Type": "application/octet-stream",
+                    "Content-Range": f"bytes {start}-{stop - 1}/{len(DATA)}",
+                },
+            )
+        return web.Response(body=writer, status=206)
+
+    app = web.Application()
+    app.router.add_get("/data", handler)
+    runner = web.AppRunner(app)
+    loop = asyncio.new_event_loop()
+    loop.run_until_complete(runner.setup())
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    loop.run_until_complete(site.start())
+    port = site._server.sockets[0].getsockname()[1]
+    thread = threading.Thread(target=loop.run_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{port}/data", state
+    loop.call_soon_threadsafe(loop.stop)
+    thread.join()
+    loop.run_until_complete(runner.cleanup())
+
+
+def test_chunks(server):
+    url, state = server
+    ranges = [(0, 10), (100, 300), (5000, 5100)]
+    notifications = queue.Queue()
+    with AIOHTTPSource(url) as source:
+        source.chunks(ranges, notifications)
+        for i in range(len(ranges)):
+            chunk = notifications.get(timeout=10)
+            assert chunk.raw_data.tobytes() == DATA[chunk.start : chunk.stop]
+
+
+def test_retry(server):
+    url, state = server
+    state["fail"] = 2
+    with AIOHTTPSource(url, retries=2, backoff=0.01) as source:
+        chunk = source.chunk(10, 20)
+        assert chunk.raw_data.tobytes() == DATA[10:20]
+    assert state["requests"] == 3
+
+
+def test_failure_notified(server):
+    url, state = server
+    state["fail"] = 100
+    notifications = queue.Queue()
+    with AIOHTTPSource(url, retries=1, backoff=0.01) as source:
+        source.chunks([(0, 10), (10, 20)], notifications)
+        for i in range(2):
+            chunk = notifications.get(timeout=10)
+            with pytest.raises(aiohttp.ClientResponseError):
+                chunk.wait()
+
+
+@pytest.mark.parametrize("multipart", [True, False])
+def test_multirange(server, multipart):
+    url, state = server
+    state["multipart"] = multipart
+    ranges = [(i * 100, i * 100 + 10 + i) for i in range(10)]
+    notifications = queue.Queue()
+    with AIOHTTPSource(url, multirange=True, max_ranges=4) as source:
+        chunks = source.chunks(ranges, notifications)
+        assert [(c.start, c.stop) for c in chunks] == ranges
+        for i in range(len(ranges)):
+            chunk = notifications.get(timeout=10)
+            assert chunk.raw_data.tobytes() == DATA[chunk.start : chunk.stop]
+        assert notifications.empty()
+        assert source._multirange == multipart
+    if multipart:
+        assert [len(r) for r in state["ranges"]] == [4, 4, 2]
+    else:
+        # one failed multi-range request, then single ranges
+        assert [len(r) for r in state["ranges"]] == [4] + [1] * 10
+
+
+@pytest.mark.parametrize("merge", [True, "first"])
+def test_multirange_single_part(server, merge):
+    url, state = server
+    state["merge"] = merge
+    ranges = [(i * 100, i * 100 + 10 + i) for i in range(10)]
+    notifications = queue.Queue()
+    with AIOHTTPSource(url, multirange=True, max_ranges=4) as source:
+        chunks = source.chunks(ranges, notifications)
+        for chunk in chunks:
+            assert chunk.raw_data.tobytes() == DATA[chunk.start : chunk.stop]
+        # only disabled if ranges are missing from the response
+        assert source._multirange == (merge is True)
+    if merge is True:
+        assert [len(r) for r in state["ranges"]] == [4, 4, 2]
+    else:
+        assert [len(r) for r in state["ranges"]] == [4] + [1] * 9
@@ -0,0 +1,123 @@
+from functools import partial
+import pytest
+import numpy as np
+import awkward as ak
+from physlite_experiments.analysis_example import (
+    has_overlap, is_associated, match_dr, match_boosted_dr,
+    has_mu_pflow_overlap, mu_pflow_or_requirement,
+)
+
+
+def random_collection(rng, counts):
+    n = counts.sum()
+    return ak.unflatten(
+        ak.zip(
+            {
+                "pt": rng.uniform(5000, 100000, n).astype(np.float32),
+                "eta": rng.uniform(-2.5, 2.5, n).astype(np.float32),
+                "phi": rng.uniform(-np.pi, np.pi, n).astype(np.float32),
+            }
+        ),
+        counts,
+    )
+
+
+def has_overlap_loop(obj1, obj2, cone):
+    out = []
+    for event1, event2 in zip(obj1.tolist(), obj2.tolist()):
+        mask = []
+        for o1 in event1:
+            dr = [
+                np.hypot(
+                    o1["eta"] - o2["eta"],
+                    (o1["phi"] - o2["phi"] + np.pi) % (2 * np.pi) - np.pi
+                )
+                for o2 in event2
+            ]
+            mask.append(any(d < cone(o1["pt"]) for d in dr))
+        out.append(mask)
+    return out
+
+
+@pytest.mark.parametrize(
+    "filter_dr, cone",
+    [
+        (match_dr, lambda pt: 0.2),
+        (partial(match_dr, cone_size=0.4), lambda pt: 0.4),
+        (match_boosted_dr, lambda pt: min(10000.0 / pt + 0.04, 0.4)),
+    ]
+)
+def test_has_overlap(filter_dr, cone):
+    rng = np.random.default_rng(42)
+    obj1 = random_collection(rng, rng.poisson(3, 200))
+    obj2 = random_collection(rng, rng.poisson(3, 200))
+    assert has_overlap(obj1, obj2, filter_dr).tolist() == has_overlap_loop(obj1, obj2, cone)
+
+
+def test_has_overlap_missing_events():
+    rng = np.random.default_rng(42)
+    valid = np.arange(20) % 3 != 0
+    obj1 = random_collection(rng, rng.poisson(3, 20)).mask[valid]
+    obj2 = random_collection(rng, rng.poisson(3, 20)).mask[valid]
+    mask = has_overlap(obj1, obj2, match_dr)
+    assert ak.is_none(mask).tolist() == (~valid).tolist()
+    assert mask[valid].tolist() == has_overlap_loop(obj1[valid], obj2[valid], lambda pt: 0.2)
+
+
+def test_is_associated():
+    jets = ak.Array(
+        [
+            [
+                {"GhostTrack": [{"m_persKey": 1, "m_persIndex": 3}, {"m_persKey": 1, "m_persIndex": 5}]},
+                {"GhostTrack": [{"m_persKey": 2, "m_persIndex": 4}]},
+                {"GhostTrack": []},
+            ],
+            [],
+            [{"GhostTrack": [{"m_persKey": 0, "m_persIndex": 0}]}],
+        ]
+    )
+    muons = ak.Array(
+        [
+            [
+                {"inDetTrackParticleLink.m_persKey": 1, "inDetTrackParticleLink.m_persIndex": 5},
+                {"inDetTrackParticleLink.m_persKey": 1, "inDetTrackParticleLink.m_persIndex": 4},
+            ],
+            [{"inDetTrackParticleLink.m_persKey": 1, "inDetTrackParticleLink.m_persIndex": 0}],
+            [{"inDetTrackParticleLink.m_persKey": 0, "inDetTrackParticleLink.m_persIndex": 0}],
+        ]
+    )
+    # same index, but different key doesn't match
+    assert is_associated(jets, muons).tolist() == [[True, False, False], [], [False]]
+    assert is_associated(muons, jets).tolist() == [[True, False], [False], [False]]
+
+
+def test_has_mu_pflow_overlap():
+    rng = np.random.default_rng(42)
+    jet_counts = rng.poisson(3, 200)
+    mu_counts = rng.poisson(2, 200)
+    jets = ak.with_field(random_collection(rng, jet_counts), ak.unflatten(
+        ak.unflatten(rng.integers(0, 8, jet_counts.sum() * 2), 2), jet_counts
+    ), "NumTrkPt500")
+    jets = ak.with_field(jets, ak.unflatten(
+        ak.unflatten(rng.uniform(0, 60000, jet_counts.sum() * 2), 2), jet_counts
+    ), "SumPtTrkPt500")
+    muons = random_collection(rng, mu_counts)
+    muons = ak.with_field(muons, ak.unflatten(
+        rng.uniform(0, 20000, mu_counts.sum()), mu_counts
+    ), "topoetcone40")
+    muons = ak.with_field(muons, ak.zip({"pt": muons.pt * 0.9}), "trackParticle")
+
+    # reference without the kernel
+    jets_ref = ak.with_field(jets, ak.firsts(jets.NumTrkPt500, axis=-1), "NumTrkPt500_0")
+    jets_ref = ak.with_field(jets_ref, ak.firsts(jets.SumPtTrkPt500, axis=-1), "SumPtTrkPt500_0")
+    muons_ref = ak.with_field(muons, muons.trackParticle.pt, "id_pt")
+    jets_x, muons_x = ak.unzip(ak.cartesian([jets_ref, muons_ref], nested=True))
+    dr = np.hypot(
+        jets_x.eta - muons_x.eta,
+        (jets_x.phi - muons_x.phi + np.pi) % (2 * np.pi) - np.pi
+    )
+    for config in [None, {"numJetTrk": 2, "lowNtrk_y0": 10000.0}]:
+        expected = ak.any(
+            mu_pflow_or_requirement(jets_x, muons_x, config) & (dr < 0.4), axis=-1
+        )
+        assert has_mu_pflow_overlap(jets, muons, config=config).tolist() == expected.tolist()
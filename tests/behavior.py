@@ -0,0 +1,99 @@
+import pytest
+import awkward as ak
+from physlite_experiments.physlite_events import Factory
+
+
+def link(key, index):
+    return {"m_persKey": key, "m_persIndex": index}
+
+
+def make_events(links, **collections):
+    array = ak.zip(
+        {
+            "Electrons": ak.zip(
+                {"pt": ak.num(links, axis=2) * 1.0, "trackParticleLinks": links},
+                depth_limit=2,
+                with_name="xAODElectron",
+            ),
+            **collections,
+        },
+        depth_limit=1,
+    )
+    form, length, container = ak.to_buffers(array)
+    branch_names = {1: "TrkA", 2: "TrkB", 4: "TrkC", 8: "CombinedMuonTrackParticles"}
+    return Factory(form.tojson(), length, container, branch_names=branch_names).events
+
+
+def test_element_link_two_targets():
+    links = ak.Array(
+        [
+            [[link(1, 0), link(2, 1)], []],
+            [],
+            # 3 is unknown, TrkC (4) not in the events, index 5 out of range
+            [[link(1, 1), link(3, 0), link(4, 0), link(1, 5), link(0, 0)]],
+        ]
+    )
+    events = make_events(
+        links,
+        TrkA=ak.zip({"pt": ak.Array([[10.0], [11.0], [12.0, 13.0]])}),
+        TrkB=ak.zip({"pt": ak.Array([[20.0, 21.0], [], [22.0]])}),
+    )
+    linked = events.Electrons.element_link(events.Electrons.trackParticleLinks)
+    assert linked.pt.tolist() == [[[10.0, 21.0], []], [], [[13.0, None, None, None]]]
+
+
+def test_element_link_no_known_keys():
+    links = ak.Array([[[link(3, 0)]], [], [[link(4, 0)], []]])
+    events = make_events(links, TrkA=ak.zip({"pt": ak.Array([[10.0], [], [12.0]])}))
+    electrons = events.Electrons
+    linked = electrons.element_link(electrons.trackParticleLinks, targets=["TrkA"])
+    assert linked.tolist() == [[[None]], [], [[None], []]]
+    # with the type of the target collection
+    assert linked.pt.tolist() == [[[None]], [], [[None], []]]
+    with pytest.raises(KeyError, match="TrkC"):
+        electrons._link_targets([4])
+
+
+def test_element_link_cached():
+    links = ak.Array([[[link(1, 0), link(2, 1)], []], [], [[link(2, 0), link(1, 1)]]])
+    events = make_events(
+        links,
+        TrkA=ak.zip({"pt": ak.Array([[10.0], [11.0], [12.0, 13.0]])}),
+        TrkB=ak.zip({"pt": ak.Array([[20.0, 21.0], [], [22.0]])}),
+    )
+    linked = events.Electrons.element_link(events.Electrons.trackParticleLinks)
+    assert events.Electrons.element_link(events.Electrons.trackParticleLinks) is linked
+    # event-level masks are applied to the cached result
+    masked = events.mask[[True, False, False]].Electrons
+    assert masked.element_link(masked.trackParticleLinks).pt.tolist() == [
+        [[10.0, 21.0], []], None, None
+    ]
+    assert len(events._element_link_cache) == 1
+    # selected objects are resolved without the cache
+    selected = events.Electrons[events.Electrons.pt > 0]
+    assert selected.element_link(selected.trackParticleLinks).pt.tolist() == [
+        [[10.0, 21.0]], [], [[22.0, 13.0]]
+    ]
+    assert len(events._element_link_cache) == 1
+
+
+def test_muon_track_particle():
+    links = ak.Array([[[link(1, 0)]], [], [[link(1, 1)]]])
+    muons = ak.zip(
+        {
+            "pt": ak.Array([[1.0, 2.0], [], [3.0]]),
+            "combinedTrackParticleLink.m_persKey": ak.Array([[8, 0], [], [8]]),
+            "combinedTrackParticleLink.m_persIndex": ak.Array([[0, 0], [], [1]]),
+        },
+        with_name="xAODMuon",
+    )
+    events = make_events(
+        links,
+        Muons=muons,
+        CombinedMuonTrackParticles=ak.zip({"pt": ak.Array([[10.0], [], [12.0, 13.0]])}),
+    )
+    assert events.Muons.trackParticle.pt.tolist() == [[10.0, None], [], [13.0]]
+    assert events.Muons.trackParticle is events.Muons.trackParticle
+    masked = events.mask[[False, True, True]].Muons
+    assert masked.trackParticle.pt.tolist() == [None, [], [13.0]]
+    assert len(events._element_link_cache) == 1
@@ -0,0 +1,56 @@
+import uproot
+import numpy as np
+import awkward as ak
+from physlite_experiments.deserialization_hacks import (
+    branch_to_array, branches_to_arrays, array_cache_key
+)
+from physlite_experiments.cache import DiskCache, LRUColumnCache
+from physlite_experiments.utils import example_file
+
+
+def test_disk_cache(tmpdir):
+    cache = DiskCache(str(tmpdir / "cache"))
+    with uproot.open(example_file()) as f:
+        branch = f["CollectionTree"]["AnalysisElectronsAuxDyn.trackParticleLinks"]
+        key = cache.key(branch, entry_start=10, entry_stop=100)
+        assert key not in cache
+        array1 = cache.branch_to_array(branch, entry_start=10, entry_stop=100)
+        assert key in cache
+        array2 = cache.branch_to_array(branch, entry_start=10, entry_stop=100)
+        array3 = branch_to_array(branch, entry_start=10, entry_stop=100)
+        assert ak.to_list(array1) == ak.to_list(array2) == ak.to_list(array3)
+
+
+def test_lru_column_cache():
+    cache = LRUColumnCache(max_bytes=100)
+    cache["a"] = np.zeros(5)
+    cache["b"] = np.zeros(5)
+    assert "a" in cache
+    cache["a"]
+    # should evict "b"
+    cache["c"] = np.zeros(5)
+    assert list(cache) == ["a", "c"]
+    assert cache.current_bytes == 80
+    assert cache.evictions == 1
+    assert cache.hits == 1
+    assert "b" not in cache
+    assert cache.misses == 0
+    assert cache.get("b") is None
+    assert cache.misses == 1
+    # too large for the cache
+    cache["d"] = np.zeros(50)
+    assert "d" not in cache
+    assert list(cache) == ["a", "c"]
+
+
+def test_lru_column_cache_stats(tmpdir):
+    path = str(tmpdir.join("test.root"))
+    with uproot.recreate(path) as f:
+        f["tree"] = {"x": ak.Array([[1.0, 2.0], [], [3.0]]), "y": np.arange(3)}
+    cache = LRUColumnCache()
+    with uproot.open(f"{path}:tree", array_cache=None) as tree:
+        cache[array_cache_key(tree["x"])] = tree["x"].array()
+        arrays = branches_to_arrays([tree["x"], tree["y"]], array_cache=cache)
+        assert arrays[1].tolist() == [0, 1, 2]
+    # one lookup per branch
+    assert (cache.hits, cache.misses) == (1, 1)
@@ -2,7 +2,14 @@ import pytest
 import uproot
 import awkward as ak
 import numpy as np
-from physlite_experiments.deserialization_hacks import branch_to_array
+from physlite_experiments.deserialization_hacks import (
+    branch_to_array,
+    interpretation_is_vector_vector,
+    _coalesce_ranges,
+    _get_baskets_multi,
+    COALESCE_MAX_GAP,
+    COALESCE_MAX_SIZE,
+)
 from physlite_experiments.utils import example_file
 
 
@@ -79,3 +86,134 @@ def test_start_stop(use_forth):
             )
             for field in array1.fields:
                 assert ak.all(array1[field] == array2[field])
+
+
+@pytest.mark.parametrize(
+    "branch_name",
+    [
+        "AnalysisJetsAuxDyn.NumTrkPt500",
+        "AnalysisElectronsAuxDyn.trackParticleLinks",
+        "EventInfoAux.streamTagNames",
+    ]
+)
+def test_parallel(branch_name):
+    with uproot.open(example_file()) as f:
+        branch = f["CollectionTree"][branch_name]
+        array1 = branch.array()
+        array2 = branch_to_array(branch, force_custom=True, parallel=True, num_workers=4)
+        assert ak.to_list(array1) == ak.to_list(array2)
+
+
+@pytest.mark.parametrize("use_forth", [True, False])
+def test_start_stop_vector_vector_vector(use_forth):
+    with uproot.open(example_file()) as f:
+        branch = f["CollectionTree"]["METAssoc_AnalysisMETAux.overlapIndices"]
+        rnd = (
+            [0]
+            + sorted(np.random.randint(branch.num_entries, size=5))
+            + [branch.num_entries]
+        )
+        for start, stop in zip(rnd[:-1], rnd[1:]):
+            array1 = branch.array(entry_start=start, entry_stop=stop)
+            array2 = branch_to_array(
+                branch,
+                force_custom=True,
+                entry_start=start,
+                entry_stop=stop,
+                use_forth=use_forth
+            )
+            assert ak.to_list(array1) == ak.to_list(array2)
+
+
+def test_tree_arrays_max_workers():
+    from physlite_experiments.deserialization_hacks import tree_arrays
+    from physlite_experiments.utils import filter_name
+
+    with uproot.open(example_file()) as f:
+        tree = f["CollectionTree"]
+        serial = tree_arrays(tree, filter_name=filter_name)
+        parallel = tree_arrays(tree, filter_name=filter_name, max_workers=4)
+        assert list(serial) == list(parallel)
+        for key in serial:
+            assert serial[key].tolist() == parallel[key].tolist()
+
+
+def test_coalesce_ranges():
+    ranges = [(0, 10), (15, 20), (100, 110), (15, 20), (112, 200)]
+    assert _coalesce_ranges(ranges, max_gap=5, max_size=1000) == {
+        (0, 20): [(0, 10), (15, 20)],
+        (100, 200): [(100, 110), (112, 200)],
+    }
+    # gap too large
+    assert list(_coalesce_ranges(ranges, max_gap=4, max_size=1000)) == [
+        (0, 10), (15, 20), (100, 200)
+    ]
+    # merged range would be too large
+    assert list(_coalesce_ranges(ranges, max_gap=100, max_size=100)) == [
+        (0, 20), (100, 200)
+    ]
+    # nothing merged
+    assert list(_coalesce_ranges(ranges, max_gap=None)) == [
+        (0, 10), (15, 20), (100, 110), (112, 200)
+    ]
+
+
+def test_coalesce_ranges_larger_than_max_size():
+    ranges = [(0, 10), (10, 500), (500, 510), (510, 520)]
+    assert _coalesce_ranges(ranges, max_gap=0, max_size=100) == {
+        (0, 10): [(0, 10)],
+        (10, 500): [(10, 500)],
+        (500, 520): [(500, 510), (510, 520)],
+    }
+
+
+@pytest.mark.parametrize(
+    "max_gap, max_size",
+    [
+        (None, COALESCE_MAX_SIZE),  # one request per basket
+        (0, 1),  # also nothing merged
+        (COALESCE_MAX_GAP, 2000),  # some merged
+        (COALESCE_MAX_GAP, COALESCE_MAX_SIZE),  # all merged
+    ]
+)
+def test_get_baskets_multi(tmpdir, max_gap, max_size):
+    path = str(tmpdir.join("baskets.root"))
+    with uproot.recreate(path) as f:
+        f.mktree("tree", {"x": "var * float64", "y": "int32"})
+        for i in range(5):
+            f["tree"].extend(
+                {
+                    "x": ak.Array([[float(i)] * (j % 4) for j in range(50)]),
+                    "y": np.arange(50, dtype="i4") + i,
+                }
+            )
+    with uproot.open(f"{path}:tree") as tree:
+        branches = [tree["x"], tree["y"]]
+        baskets = _get_baskets_multi(
+            branches, entry_start=60, entry_stop=160, max_gap=max_gap, max_size=max_size
+        )
+        for branch, branch_baskets in zip(branches, baskets):
+            assert sorted(branch_baskets) == [1, 2, 3]
+            for basket_num, basket in branch_baskets.items():
+                expected = branch.basket(basket_num)
+                assert basket.data.tobytes() == expected.data.tobytes()
+                assert basket.num_entries == expected.num_entries
+
+
+def test_interpretation_is_vector_vector(tmpdir):
+    path = str(tmpdir.join("flat.root"))
+    with uproot.recreate(path) as f:
+        f["tree"] = {"x": np.arange(3.0)}
+    with uproot.open(f"{path}:tree") as tree:
+        assert not interpretation_is_vector_vector(tree["x"].interpretation)
+
+
+def test_interpretation_is_vector_vector_physlite():
+    with uproot.open(example_file()) as f:
+        tree = f["CollectionTree"]
+        assert interpretation_is_vector_vector(
+            tree["AnalysisElectronsAuxDyn.trackParticleLinks"].interpretation
+        )
+        assert interpretation_is_vector_vector(
+            tree["AnalysisJetsAuxDyn.NumTrkPt500"].interpretation
+        )
@@ -0,0 +1,47 @@
+import pytest
+import h5py
+import awkward as ak
+from physlite_experiments.hdf5 import HDF5Writer, HDF5Container, to_hdf5, from_hdf5
+
+
+@pytest.fixture
+def array():
+    return ak.Array(
+        [
+            {"x": 1, "el": [{"pt": 1.0, "links": [1, 2]}, {"pt": 2.0, "links": []}]},
+            {"x": 2, "el": []},
+            {"x": 3, "el": [{"pt": 3.0, "links": [3]}]},
+        ] * 4
+    )
+
+
+def test_append(tmpdir, array):
+    path = str(tmpdir / "test.h5")
+    with HDF5Writer(path) as writer:
+        writer.write(array[:5])
+        writer.write(array[5:])
+    assert from_hdf5(path).tolist() == array.tolist()
+
+
+@pytest.mark.parametrize("entry_start, entry_stop", [(2, 7), (5, 6), (11, 12), (3, 3)])
+@pytest.mark.parametrize("compression, chunk_size", [("lzf", 4), (None, None)])
+def test_entry_range(tmpdir, array, entry_start, entry_stop, compression, chunk_size):
+    path = str(tmpdir / "test.h5")
+    to_hdf5(array, path, compression=compression, chunk_size=chunk_size)
+    lazy = from_hdf5(path, entry_start=entry_start, entry_stop=entry_stop, lazy=True)
+    assert lazy.tolist() == array[entry_start:entry_stop].tolist()
+
+
+@pytest.mark.parametrize("compression, chunk_size", [("lzf", 4), (None, None)])
+def test_file_closed(tmpdir, array, compression, chunk_size):
+    path = str(tmpdir / "test.h5")
+    to_hdf5(array, path, compression=compression, chunk_size=chunk_size)
+    result = from_hdf5(path)
+    # can only be opened for writing if no other handle is open
+    h5py.File(path, "a").close()
+    assert result.tolist() == array.tolist()
+    with HDF5Container.open(path, entry_start=2, entry_stop=7) as container:
+        assert container.file.id.valid
+        lazy = ak.from_buffers(container.form, container.length, container, lazy=True)
+        assert lazy.tolist() == array[2:7].tolist()
+    assert not container.file.id.valid
@@ -0,0 +1,235 @@
+import os
+import json
+import types
+import pytest
+import numpy as np
+import awkward as ak
+from physlite_experiments.physlite_events import (
+    Factory, LazyGet, get_lazy_form, lazy_parquet, get_branch_names,
+    accessed_branches,
+)
+from physlite_experiments.behavior import _global_link_index
+
+
+def events_array(n, offset=0):
+    return ak.Array(
+        [
+            {
+                "Electrons": [{"pt": float(i + offset), "links": list(range(i % 3))}] * (i % 4),
+                "Jets": [{"pt": 2.0 * i}] * (i % 2),
+            }
+            for i in range(n)
+        ]
+    )
+
+
+@pytest.fixture
+def parquet_dir(tmpdir):
+    pytest.importorskip("pyarrow")
+    array = events_array(30)
+    path = str(tmpdir / "events")
+    os.makedirs(path)
+    ak.to_parquet(array[:12], os.path.join(path, "part0.parquet"))
+    ak.to_parquet(array[12:], os.path.join(path, "part1.parquet"))
+    return path, array
+
+
+@pytest.mark.parametrize("entry_start, entry_stop", [(0, 30), (5, 20), (12, 13), (29, 100)])
+def test_from_parquet_dataset(parquet_dir, entry_start, entry_stop):
+    path, array = parquet_dir
+    events = Factory.from_parquet(path, entry_start, entry_stop).events
+    assert events.tolist() == array[entry_start:entry_stop].tolist()
+
+
+def test_from_parquet_dataset_rewritten(parquet_dir):
+    path, array = parquet_dir
+    assert Factory.from_parquet(path).events.tolist() == array.tolist()
+    # nothing is cached without passing a cache
+    ak.to_parquet(events_array(5, offset=100), os.path.join(path, "part1.parquet"))
+    expected = array[:12].tolist() + events_array(5, offset=100).tolist()
+    assert Factory.from_parquet(path).events.tolist() == expected
+
+
+def test_lazy_parquet_cache(tmpdir):
+    pytest.importorskip("pyarrow")
+    path = str(tmpdir / "events.parquet")
+    ak.to_parquet(events_array(10), path)
+    cache = {}
+    assert lazy_parquet(path, cache=cache)[0] is lazy_parquet(path, cache=cache)[0]
+    assert len(cache) == 1
+    for start, stop in [(0, 5), (5, 10)]:
+        events = Factory.from_parquet(path, start, stop, cache=cache).events
+        assert events.tolist() == events_array(10)[start:stop].tolist()
+
+
+@pytest.fixture
+def parquet_file(tmpdir):
+    pytest.importorskip("pyarrow")
+    array = events_array(30)
+    path = str(tmpdir / "events.parquet")
+    # one row group per partition
+    ak.to_parquet(ak.repartition(array, 7), path)
+    return path
+
+
+@pytest.mark.parametrize(
+    "entry_start, entry_stop", [(0, 30), (5, 23), (6, 8), (7, 14), (13, 15), (28, 30), (10, 10)]
+)
+def test_from_parquet_row_groups(parquet_file, entry_start, entry_stop):
+    import pyarrow.parquet as pq
+
+    assert pq.ParquetFile(parquet_file).num_row_groups == 5
+    events = Factory.from_parquet(parquet_file, entry_start, entry_stop).events
+    expected = ak.from_parquet(parquet_file)[entry_start:entry_stop]
+    assert events.tolist() == expected.tolist()
+
+
+def test_from_parquet_rewritten(parquet_file):
+    cache = {}
+    Factory.from_parquet(parquet_file, 0, 10, cache=cache).events.tolist()
+    assert len(cache) == 2
+    ak.to_parquet(events_array(20, offset=100), parquet_file)
+    # nothing is cached without passing a cache
+    events = Factory.from_parquet(parquet_file).events
+    assert events.tolist() == events_array(20, offset=100).tolist()
+
+
+class FakeBranch:
+    "Just enough of an uproot branch for `LazyGet` (falls back to `array`)"
+
+    interpretation = types.SimpleNamespace(cache_key="fake")
+
+    def __init__(self, name, array):
+        self.name = name
+        self.cache_key = name
+        self._array = array
+
+    def array(self, entry_start=None, entry_stop=None):
+        return self._array[entry_start:entry_stop]
+
+
+class FakeTree:
+    file = None
+
+    def __init__(self, arrays):
+        self.branches = {name: FakeBranch(name, array) for name, array in arrays.items()}
+
+    def __getitem__(self, key):
+        return self.branches[key]
+
+
+def link_factory(local2global):
+    def link(key, index):
+        return {"m_persKey": key, "m_persIndex": index}
+
+    arrays = {
+        "AnalysisElectronsAuxDyn.pt": ak.Array([[1.0, 2.0], [], [3.0], [4.0]]),
+        "AnalysisElectronsAuxDyn.trackParticleLinks": ak.Array(
+            [
+                [[link(1, 0), link(2, 1)], []],
+                [],
+                [[link(1, 1), link(1, 5), link(3, 0), link(2, 0)]],
+                [[link(2, 1), link(1, 0)]],
+            ]
+        ),
+        # nested - not used for the offsets
+        "TrkAAuxDyn.hitCounts": ak.Array([[[1, 2]], [[3]], [[], [4]], [[5]]]),
+        "TrkAAuxDyn.pt": ak.Array([[10.0], [11.0], [12.0, 13.0], [14.0]]),
+        "TrkBAuxDyn.pt": ak.Array([[20.0, 21.0], [], [22.0], [23.0, 24.0]]),
+    }
+    branch_names = {1: "TrkA", 2: "TrkB"}
+    form = get_lazy_form(
+        {key: array.layout.form for key, array in arrays.items()},
+        local2global=local2global,
+    )
+    container = LazyGet(
+        FakeTree(arrays), cache={}, branch_names=branch_names, form=json.dumps(form)
+    )
+    return Factory(json.dumps(form), 4, container, branch_names=branch_names)
+
+
+def link_events(local2global):
+    return link_factory(local2global).events
+
+
+def test_local2global_matches_fallback():
+    events = link_events(local2global=True)
+    links = events.Electrons.trackParticleLinks
+    keys, offsets, bases, contents = events.Electrons._link_targets(np.array([1, 2]))
+    link_key = ak.to_numpy(ak.flatten(links.m_persKey, axis=None)).astype(np.int64)
+    num_outer = ak.to_numpy(ak.num(links, axis=1))
+    num_inner = ak.to_numpy(ak.flatten(ak.num(links, axis=2)))
+    expected = _global_link_index(
+        np.repeat(np.repeat(np.arange(len(links)), num_outer), num_inner),
+        link_key,
+        ak.to_numpy(ak.flatten(links.m_persIndex, axis=None)).astype(np.int64),
+        keys,
+        offsets,
+        bases,
+    )
+    local_index = ak.to_numpy(ak.flatten(links.globalIndex, axis=None))
+    k = np.minimum(np.searchsorted(keys, link_key), len(keys) - 1)
+    global_index = np.where(
+        (local_index >= 0) & (keys[k] == link_key), bases[k] + local_index, -1
+    )
+    assert global_index.tolist() == expected.tolist()
+
+
+def test_local2global_target_offsets():
+    factory = link_factory(local2global=True)
+    assert json.loads(factory.form)["contents"]["TrkA"]["form_key"] == "TrkAAuxDyn.pt%offsets"
+    ak.flatten(factory.events.Electrons.trackParticleLinks.globalIndex, axis=None)
+    assert sorted(factory.container.touched_keys) == [
+        "AnalysisElectronsAuxDyn.pt",
+        "AnalysisElectronsAuxDyn.trackParticleLinks",
+        "TrkAAuxDyn.pt",
+        "TrkBAuxDyn.pt",
+    ]
+
+
+@pytest.mark.parametrize("start", [0, 1, 2])
+def test_local2global_sliced(start):
+    fallback = link_events(local2global=False)
+    assert "globalIndex" not in fallback.Electrons.trackParticleLinks.fields
+    expected = fallback.Electrons.element_link(fallback.Electrons.trackParticleLinks)
+    # the behaviors refer to the full events (weakly), so keep them
+    events = link_events(local2global=True)
+    electrons = events[start:].Electrons
+    linked = electrons.element_link(electrons.trackParticleLinks)
+    assert linked.pt.tolist() == expected.pt[start:].tolist()
+    assert linked.pt.tolist()[-1] == [[24.0, 14.0]]
+
+
+@pytest.mark.parametrize("local2global", [True, False])
+def test_accessed_branches(local2global):
+    def select(events):
+        electrons = events.Electrons[events.Electrons.pt > 1]
+        # without valid links (zero events) the type comes from the targets
+        linked = electrons.element_link(
+            electrons.trackParticleLinks, targets=["TrkA", "TrkB"]
+        )
+        return linked.pt
+
+    factory = link_factory(local2global)
+    select(factory.events)
+    keys = accessed_branches(factory.form, select, factory.branch_names)
+    assert sorted(keys) == sorted(factory.container.touched_keys)
+    assert "TrkBAuxDyn.pt" in keys
+
+
+class BrokenFile:
+    "uproot file without (readable) MetaData"
+
+    uuid = "broken-file"
+
+    def __getitem__(self, key):
+        raise KeyError(key)
+
+
+def test_get_branch_names_fallback():
+    with pytest.warns(UserWarning, match="using defaults"):
+        branch_names = get_branch_names(BrokenFile())
+    assert branch_names == get_branch_names()
+    assert len(branch_names) > 0
+    # memoized per file
+    assert get_branch_names(BrokenFile()) is branch_names
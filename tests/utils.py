@@ -0,0 +1,22 @@
+import numpy as np
+import uproot
+from physlite_experiments.utils import basket_aligned_chunks
+
+
+def test_basket_aligned_chunks(tmpdir):
+    path = str(tmpdir.join("baskets.root"))
+    with uproot.recreate(path) as f:
+        f.mktree("tree", {"x": "f8", "y": "i4"})
+        for i in range(10):
+            f["tree"].extend({"x": np.arange(100.0), "y": np.arange(100, dtype="i4")})
+    with uproot.open(f"{path}:tree") as tree:
+        branches = [tree["x"], tree["y"]]
+        chunks = basket_aligned_chunks(branches, chunk_entries=250)
+        assert chunks[0][0] == 0 and chunks[-1][1] == 1000
+        assert all(stop == start for (_, stop), (start, _) in zip(chunks[:-1], chunks[1:]))
+        assert all(start % 100 == 0 for start, stop in chunks)
+        assert basket_aligned_chunks(branches, 150, 1000, chunk_entries=250)[0] == (150, 400)
+        assert basket_aligned_chunks([tree["x"]], chunk_bytes=8 * 300) == [
+            (0, 300), (300, 600), (600, 1000)
+        ]
+        assert basket_aligned_chunks(branches) == [(0, 1000)]